@@ -17,25 +17,45 @@ Note: This file assumes it lives in the ``violation_web`` folder with
 ``utils.py``, ``models.py`` and a ``templates`` directory alongside it.
 """
 
+import atexit
+import functools
+import hashlib
 import os
-from datetime import datetime, timedelta
-from typing import Optional, List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from types import MappingProxyType, SimpleNamespace
+from typing import List, Mapping, NamedTuple, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from flask import (
-    Flask, render_template, request, redirect, url_for, flash, session, jsonify
+    Flask, g, render_template, request, redirect, url_for, flash, session, jsonify
 )
+from flask_caching import Cache
+from flask_session import Session
 from flask_sqlalchemy import SQLAlchemy
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import case, event, func, union_all
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import joinedload, raiseload, selectinload
 from werkzeug.security import generate_password_hash, check_password_hash
 
 from .utils import (
-    import_excel_if_needed, compute_week_number, format_currency,
+    import_excel_if_needed, compute_week_number, compute_custom_week, format_currency,
     generate_payment_message, generate_qr_code_base64
 )
-from .utils import update_excel_payment
-from .utils import remove_violation_from_excel
+from .utils import apply_excel_updates
 from werkzeug.utils import secure_filename
 
-from .utils import get_ds_lop_names
+from .utils import load_ds_lop_names
+
+try:
+    import redis  # type: ignore
+    _REDIS_AVAILABLE = True
+except ImportError:
+    _REDIS_AVAILABLE = False
 
 # -----------------------------------------------------------------------------
 # Configuration
@@ -43,23 +63,138 @@ from .utils import get_ds_lop_names
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 DATABASE_PATH = os.path.join(BASE_DIR, 'database.db')
+# Cached copy of the DS_LOP student names so startup can skip the workbook
+DS_LOP_SNAPSHOT_PATH = os.path.join(BASE_DIR, 'ds_lop.json')
+
+# Local time of the class (Indochina Time, UTC+7, no daylight saving).
+# Hosts without a tz database (e.g. Windows without ``tzdata``) fall back
+# to the fixed offset.
+try:
+    _ICT = ZoneInfo('Asia/Ho_Chi_Minh')
+except ZoneInfoNotFoundError:
+    _ICT = timezone(timedelta(hours=7), 'ICT')
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('FLASK_SECRET_KEY', 'replace-me')
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
+# Connections kept per worker process, and how many more may be opened
+# under bursts.  Size them so workers * (size + overflow) stays below the
+# database server's connection limit.
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
 
 if DATABASE_URL:
     # Khi chạy trên Render (PostgreSQL)
     app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
+    # Keep warm connections around so requests do not pay for a new
+    # TCP/TLS handshake; pre-ping and recycle guard against connections
+    # dropped by the server while idle.
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+        'query_cache_size': 1200,
+        'connect_args': {'options': '-c statement_timeout=5000'},
+    }
 else:
     # Khi chạy local (SQLite)
     app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{DATABASE_PATH}'
+    # Pooled file connections may be handed to other threads (request
+    # threads and the Excel worker); wait up to 5s on a locked database.
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'query_cache_size': 1200,
+        'connect_args': {'check_same_thread': False, 'timeout': 5},
+    }
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 db = SQLAlchemy(app)
 
+# Optional Redis connection used for hot counters.  When ``REDIS_URL`` is
+# not set (or the ``redis`` package is missing) everything falls back to
+# the database.
+REDIS_URL = os.environ.get('REDIS_URL')
+redis_client = redis.Redis.from_url(REDIS_URL) if REDIS_URL and _REDIS_AVAILABLE else None
+VISIT_COUNT_KEY = 'vc:total'
+# Persist the Redis visit counter to ``VisitCount`` every N increments.
+VISIT_FLUSH_EVERY = 50
+
+# Background worker for mirroring changes into the Excel workbook.  One
+# thread only: openpyxl rewrites the whole file, so updates must not
+# overlap.  ``apply_excel_updates`` also takes a lock file so writes from
+# other worker processes do not overlap either.
+_excel_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='excel')
+atexit.register(_excel_executor.shutdown, wait=True)
+# Changes still to be mirrored into the workbook, as ``(kind, payload)``
+# pairs for ``apply_excel_updates``.  Changes queued within
+# ``EXCEL_BATCH_DELAY`` seconds of each other are written with one
+# load/save of the file.
+EXCEL_BATCH_DELAY = 2
+_pending_excel_updates: list = []
+_pending_excel_lock = threading.Lock()
+
+# With Redis available, keep session data server-side so each request
+# carries only a small session id cookie instead of the signed payload.
+if redis_client is not None:
+    app.config.update(
+        SESSION_TYPE='redis',
+        SESSION_REDIS=redis_client,
+        SESSION_PERMANENT=False,
+    )
+    Session(app)
+
+# Cache for computed page fragments.  Shared through Redis when it is
+# configured, otherwise kept in the memory of each worker process.
+cache = Cache(app, config={
+    'CACHE_TYPE': 'RedisCache' if redis_client is not None else 'SimpleCache',
+    'CACHE_REDIS_URL': REDIS_URL,
+    'CACHE_DEFAULT_TIMEOUT': 300,
+})
+# Compiled templates are also written to a per-user temp directory so new
+# worker processes load them instead of recompiling.  Templates are only
+# re-checked on disk in debug mode (Flask's default).
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+
+# Seconds before the home page dashboard is recomputed even without a
+# record change.
+DASHBOARD_CACHE_TIMEOUT = 60
+
+# Notifications shown in the navigation dropdown and per page on the
+# notifications page.
+NAV_NOTIFICATION_LIMIT = 25
+NOTIFICATIONS_PER_PAGE = 50
+
+# Students per page on the summary table; ``?size=`` overrides it.
+SUMMARY_STUDENTS_PER_PAGE = 50
+
+# Connection-level tuning for the local SQLite database.  WAL lets readers
+# proceed while the visit counter or a payment is being written, NORMAL
+# synchronous drops an fsync per commit (safe under WAL) and the larger
+# page cache / mmap keep hot pages in memory.  PostgreSQL is left alone.
+SQLITE_PRAGMAS = (
+    'journal_mode=WAL',
+    'synchronous=NORMAL',
+    'busy_timeout=5000',
+    'cache_size=-20000',
+    'temp_store=MEMORY',
+    'mmap_size=268435456',
+    'foreign_keys=ON',
+)
+
+
+@event.listens_for(Engine, 'connect')
+def _apply_sqlite_pragmas(dbapi_conn, _connection_record) -> None:
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        return
+    cursor = dbapi_conn.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(f'PRAGMA {pragma}')
+    cursor.close()
+
 
 # -----------------------------------------------------------------------------
 # Database Models
@@ -120,18 +255,35 @@ class ViolationRecord(db.Model):
     free‑form comments.  ``created_at`` is used to sort records chronologically.
     """
     __tablename__ = 'violation_records'
+    # ``student_name`` and ``week`` are covered by the leading columns of
+    # the composite indexes, so they do not need single-column indexes.
+    # The first one also carries the (date, id) order used to number
+    # repeated offences, so the penalty window needs no separate sort.
+    # Its (student_name, week, error_code) prefix also answers the
+    # ``count_prior_offences`` COUNT from the index alone.
+    __table_args__ = (
+        db.Index('ix_vr_student_week_code_date', 'student_name', 'week', 'error_code', 'date', 'id'),
+        db.Index('ix_vr_week_date', 'week', 'date'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     sheet_name = db.Column(db.String(64), nullable=False)
     week = db.Column(db.Integer, nullable=False)
-    date = db.Column(db.Date, nullable=False)
+    date = db.Column(db.Date, nullable=False, index=True)
     student_name = db.Column(db.String(128), nullable=False)
-    error_code = db.Column(db.String(8), nullable=False)
+    error_code = db.Column(db.String(8), nullable=False, index=True)
     reason = db.Column(db.String(512), nullable=True)
     amount_due = db.Column(db.Integer, nullable=False, default=0)
     amount_paid = db.Column(db.Integer, nullable=False, default=0)
     payment_date = db.Column(db.Date, nullable=True)
     notes = db.Column(db.String(512), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # There is no foreign key constraint on ``error_code`` (imported rows
+    # may carry codes that were never defined), so the join is explicit.
+    error = db.relationship(
+        'ErrorCode',
+        primaryjoin='foreign(ViolationRecord.error_code) == ErrorCode.code',
+        viewonly=True,
+    )
 
     def unpaid_amount(self) -> int:
         return max(self.amount_due - self.amount_paid, 0)
@@ -139,6 +291,9 @@ class ViolationRecord(db.Model):
 
 class Payment(db.Model):
     __tablename__ = 'payments'
+    __table_args__ = (
+        db.Index('ix_payment_user_transfer', 'user_id', 'transfer_date'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     amount = db.Column(db.Integer, nullable=False)
@@ -183,6 +338,10 @@ class Notification(db.Model):
     The ``is_read`` flag marks whether the notification has been seen.
     """
     __tablename__ = 'notifications'
+    __table_args__ = (
+        db.Index('ix_notif_user_read_created', 'user_id', 'is_read', 'created_at'),
+        db.Index('ix_notif_user_created', 'user_id', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     message = db.Column(db.String(512), nullable=False)
@@ -222,10 +381,154 @@ def login_required(fn):
 
 
 def get_current_user() -> Optional[User]:
+    """
+    Return the logged in user, loaded once per request and kept on
+    ``flask.g``.  Relationships are loaded with ``raiseload`` so an
+    accidental ``user.payments``/``user.notifications`` access fails
+    loudly instead of issuing a hidden query; code that needs them
+    should query ``Payment``/``Notification`` directly.
+    """
     user_id = session.get('user_id')
-    if user_id:
-        return User.query.get(int(user_id))
-    return None
+    if not user_id:
+        return None
+    cached = g.get('current_user')
+    if cached is not None and cached[0] == user_id:
+        return cached[1]
+    user = db.session.execute(
+        db.select(User).options(raiseload('*')).where(User.id == int(user_id))
+    ).scalar_one_or_none()
+    g.current_user = (user_id, user)
+    return user
+
+
+@functools.lru_cache(maxsize=64)
+def _resolve_url(endpoint: str, script_root: str) -> str:
+    return url_for(endpoint)
+
+
+def page_url(endpoint: str) -> str:
+    """
+    ``url_for`` for an endpoint without arguments, as used in breadcrumbs.
+    The URL only changes with the mount point, so it is resolved once per
+    endpoint and script root instead of walking the URL map every time.
+    """
+    return _resolve_url(endpoint, request.script_root)
+
+
+def local_now() -> datetime:
+    """Return the current time in Hanoi (UTC+7) as a naive datetime."""
+    return datetime.now(_ICT).replace(tzinfo=None)
+
+
+def get_current_week() -> int:
+    """
+    Return the custom week number for today's date in Hanoi (UTC+7).  The
+    value is computed once per request and kept on ``flask.g``.
+    """
+    if 'current_week' not in g:
+        today_local = local_now().date()
+        g.current_week = compute_custom_week(today_local)
+    return g.current_week
+
+
+class ErrorCodeInfo(NamedTuple):
+    """Immutable copy of an ``ErrorCode`` row, usable without a session."""
+    code: str
+    description: str
+    default_amount: int
+
+
+# Every error code, keyed by code.  The ``error_codes`` table is tiny and
+# practically never changes, so it is loaded lazily once per process
+# instead of on every page load.  Anything that modifies ``ErrorCode``
+# rows must call ``invalidate_error_codes()`` afterwards.
+_ERROR_CODE_CACHE: Optional[Mapping[str, ErrorCodeInfo]] = None
+_ERROR_DEFAULTS_CACHE: Optional[Mapping[str, int]] = None
+
+
+def get_error_codes() -> Mapping[str, ErrorCodeInfo]:
+    """Return a read-only mapping of error code to ``ErrorCodeInfo``, ordered by code."""
+    global _ERROR_CODE_CACHE, _ERROR_DEFAULTS_CACHE
+    if _ERROR_CODE_CACHE is None:
+        rows = db.session.execute(
+            db.select(ErrorCode.code, ErrorCode.description, ErrorCode.default_amount)
+            .order_by(ErrorCode.code)
+        ).all()
+        codes = {row.code: ErrorCodeInfo(*row) for row in rows}
+        _ERROR_DEFAULTS_CACHE = MappingProxyType({code: info.default_amount for code, info in codes.items()})
+        _ERROR_CODE_CACHE = MappingProxyType(codes)
+    return _ERROR_CODE_CACHE
+
+
+def get_error_defaults() -> Mapping[str, int]:
+    """Return a read-only mapping of error code to its default penalty amount."""
+    get_error_codes()
+    return _ERROR_DEFAULTS_CACHE
+
+
+def invalidate_error_codes() -> None:
+    """Drop the cached error codes so they are reloaded on next use."""
+    global _ERROR_CODE_CACHE, _ERROR_DEFAULTS_CACHE
+    _ERROR_CODE_CACHE = None
+    _ERROR_DEFAULTS_CACHE = None
+    # Dashboard totals are priced with these defaults
+    invalidate_dashboard()
+
+
+def submit_excel_task(fn, *args) -> None:
+    """
+    Run an Excel workbook update on the background worker.  Writes to the
+    ``.xlsm`` file can take hundreds of milliseconds, so requests only
+    queue them.  The single worker thread keeps openpyxl writes to the
+    workbook strictly sequential.  Failures are logged, never raised.
+    """
+    def run() -> None:
+        try:
+            fn(*args)
+        except Exception:
+            app.logger.exception('Excel update %s failed', fn.__name__)
+
+    _excel_executor.submit(run)
+
+
+def queue_excel_update(kind: str, payload) -> None:
+    """
+    Schedule a workbook change (``'append'``/``'delete'`` with a record
+    snapshot, or ``'pay'`` with a student name).  If a flush is already
+    pending the change simply joins its batch.
+    """
+    with _pending_excel_lock:
+        schedule = not _pending_excel_updates
+        _pending_excel_updates.append((kind, payload))
+    if schedule:
+        submit_excel_task(flush_excel_updates)
+
+
+def flush_excel_updates() -> None:
+    """Write every pending change to the workbook (runs on the Excel worker)."""
+    time.sleep(EXCEL_BATCH_DELAY)
+    with _pending_excel_lock:
+        updates = list(_pending_excel_updates)
+        _pending_excel_updates.clear()
+    excel_path = os.path.join(BASE_DIR, '..', 'Danh Sách Vi Phạm .xlsm')
+    apply_excel_updates(excel_path, updates)
+
+
+def get_outstanding(student_name: str) -> int:
+    """
+    Sum the unpaid amounts (``amount_due - amount_paid``, floored at zero)
+    of every record for ``student_name`` in a single aggregate query.
+    """
+    unpaid = case(
+        (ViolationRecord.amount_due > ViolationRecord.amount_paid,
+         ViolationRecord.amount_due - ViolationRecord.amount_paid),
+        else_=0,
+    )
+    total = db.session.execute(
+        db.select(func.coalesce(func.sum(unpaid), 0))
+        .where(ViolationRecord.student_name == student_name)
+    ).scalar()
+    return int(total)
 
 
 def increment_visit() -> None:
@@ -246,14 +549,59 @@ def increment_visit() -> None:
         # Do nothing if a visit has already been recorded for this session
         if session.get('visit_recorded'):
             return
-        vc = VisitCount.query.first()
-        if vc:
-            vc.count += 1
+        if redis_client is not None:
+            # Count in Redis and only write the value back to the database
+            # every ``VISIT_FLUSH_EVERY`` visits so it survives a Redis reset.
+            # A lost key is re-seeded from the database first, and the
+            # write-back never lowers the stored value.
+            if not redis_client.exists(VISIT_COUNT_KEY):
+                seed_redis_visit_count()
+            total = redis_client.incr(VISIT_COUNT_KEY)
+            if total % VISIT_FLUSH_EVERY == 0:
+                db.session.execute(
+                    db.update(VisitCount).where(VisitCount.count < total).values(count=total)
+                )
+                db.session.commit()
+        else:
+            # A single UPDATE increments in place without loading the row
+            db.session.execute(db.update(VisitCount).values(count=VisitCount.count + 1))
             db.session.commit()
         session['visit_recorded'] = True
     except Exception:
         pass
 
+
+def get_visit_count() -> Optional[int]:
+    """
+    Return the total number of recorded visits.  When Redis is configured
+    the live counter is read from there (seeded from the ``VisitCount``
+    row the first time); otherwise the database row is used directly.
+    ``None`` is returned if no counter exists yet.
+    """
+    if redis_client is not None:
+        try:
+            value = redis_client.get(VISIT_COUNT_KEY)
+            if value is None:
+                seed_redis_visit_count()
+                value = redis_client.get(VISIT_COUNT_KEY)
+            return int(value)
+        except redis.RedisError:
+            pass
+    return _stored_visit_count()
+
+
+def seed_redis_visit_count() -> None:
+    """
+    Start the Redis counter from the persisted value.  ``setnx`` leaves a
+    live counter untouched when another worker has already seeded it.
+    """
+    redis_client.setnx(VISIT_COUNT_KEY, _stored_visit_count() or 0)
+
+
+def _stored_visit_count() -> Optional[int]:
+    """Read the persisted counter value without building an ORM object."""
+    return db.session.execute(db.select(VisitCount.count).limit(1)).scalar()
+
 # -----------------------------------------------------------------------------
 # Context processors
 # -----------------------------------------------------------------------------
@@ -274,20 +622,24 @@ def inject_nav_metrics() -> dict:
     if user:
         # Compute outstanding only if the student name is set
         if user.student_name:
-            records = ViolationRecord.query.filter_by(student_name=user.student_name).all()
-            outstanding = sum(r.unpaid_amount() for r in records)
+            outstanding = get_outstanding(user.student_name)
         # Determine notifications for the navigation dropdown.  Admins
-        # see all notifications; normal users see only their own.  We
-        # no longer limit the number returned so that users can see
-        # all recent activity.  Notifications are ordered newest first.
-        if user.is_admin:
-            notes_query = Notification.query.order_by(Notification.created_at.desc())
-            # Admins count unread across all users to highlight pending items
-            notifications_count = Notification.query.filter_by(is_read=False).count()
-        else:
-            notes_query = Notification.query.filter_by(user_id=user.id).order_by(Notification.created_at.desc())
-            notifications_count = Notification.query.filter_by(user_id=user.id, is_read=False).count()
-        notes = notes_query.all()
+        # see all notifications; normal users see only their own.  Only
+        # the newest ``NAV_NOTIFICATION_LIMIT`` are listed; the full
+        # history is on the paginated notifications page.
+        # The unread badge is computed as a window aggregate over the
+        # same rows so the list and the count come from one statement
+        # (window functions are evaluated before LIMIT); for admins this
+        # counts unread items across all users.
+        unread = func.sum(case((Notification.is_read.is_(False), 1), else_=0)).over()
+        notes_query = db.select(
+            Notification.id, Notification.message, Notification.url,
+            Notification.is_read, Notification.created_at, unread.label('unread'),
+        ).order_by(Notification.created_at.desc()).limit(NAV_NOTIFICATION_LIMIT)
+        if not user.is_admin:
+            notes_query = notes_query.where(Notification.user_id == user.id)
+        notes = db.session.execute(notes_query).all()
+        notifications_count = int(notes[0].unread) if notes else 0
         nav_notification_list = [
             {
                 'id': n.id,
@@ -300,9 +652,7 @@ def inject_nav_metrics() -> dict:
         ]
     # Always include total visits in the nav; show to everyone for the
     # dashboard card but not necessarily as a badge
-    vc = VisitCount.query.first()
-    if vc:
-        visit_count = vc.count
+    visit_count = get_visit_count()
     return {
         'nav_outstanding': outstanding,
         'nav_notifications': notifications_count,
@@ -315,47 +665,117 @@ def inject_nav_metrics() -> dict:
 # Startup logic
 # -----------------------------------------------------------------------------
 
-def initialise_database() -> None:
-    db.create_all()
+def create_student_name_search() -> None:
+    """
+    Create an index that serves the ``%name%`` substring search used by
+    the summary filter, which a regular B-tree index cannot help with.
+
+    On SQLite this is an FTS5 table with the ``trigram`` tokenizer kept in
+    sync with ``violation_records`` by triggers; ``LIKE`` queries against
+    it are answered from the index.  On PostgreSQL a ``pg_trgm`` GIN index
+    makes the plain ``ILIKE`` indexable.  Failures (e.g. an SQLite build
+    without FTS5 or a role that cannot create extensions) are ignored and
+    the summary falls back to a table scan.
+    """
+    dialect = db.engine.dialect.name
+    app.config['STUDENT_NAME_FTS'] = False
+    try:
+        with db.engine.begin() as conn:
+            if dialect == 'sqlite':
+                exists = conn.execute(db.text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'vr_fts'"
+                )).first()
+                conn.execute(db.text(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS vr_fts USING fts5("
+                    "student_name, content='violation_records', content_rowid='id', "
+                    "tokenize='trigram')"
+                ))
+                conn.execute(db.text(
+                    "CREATE TRIGGER IF NOT EXISTS vr_fts_ai AFTER INSERT ON violation_records BEGIN "
+                    "INSERT INTO vr_fts(rowid, student_name) VALUES (new.id, new.student_name); END"
+                ))
+                conn.execute(db.text(
+                    "CREATE TRIGGER IF NOT EXISTS vr_fts_ad AFTER DELETE ON violation_records BEGIN "
+                    "INSERT INTO vr_fts(vr_fts, rowid, student_name) "
+                    "VALUES ('delete', old.id, old.student_name); END"
+                ))
+                conn.execute(db.text(
+                    "CREATE TRIGGER IF NOT EXISTS vr_fts_au AFTER UPDATE OF student_name "
+                    "ON violation_records BEGIN "
+                    "INSERT INTO vr_fts(vr_fts, rowid, student_name) "
+                    "VALUES ('delete', old.id, old.student_name); "
+                    "INSERT INTO vr_fts(rowid, student_name) VALUES (new.id, new.student_name); END"
+                ))
+                if not exists:
+                    # Index the rows that were present before the table existed
+                    conn.execute(db.text("INSERT INTO vr_fts(vr_fts) VALUES ('rebuild')"))
+                app.config['STUDENT_NAME_FTS'] = True
+            elif dialect == 'postgresql':
+                conn.execute(db.text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+                conn.execute(db.text(
+                    'CREATE INDEX IF NOT EXISTS ix_vr_student_name_trgm '
+                    'ON violation_records USING gin (student_name gin_trgm_ops)'
+                ))
+    except Exception:
+        pass
 
-    if ErrorCode.query.count() == 0:
-        codes = [
-            ('VP01', 'Đi muộn', 10000),
-            ('VP02', 'Cho người lạ vào lớp', 0),
-            ('VP03', 'Đổi chỗ', 10000),
-            ('VP04', 'Quên đồ dùng học tập', 10000),
-            ('VP05', 'Ngủ trong giờ học', 10000),
-            ('VP06', 'Nghỉ học vô lí do', 30000),
-        ]
-        for code, desc, amt in codes:
-            db.session.add(ErrorCode(code=code, description=desc, default_amount=amt))
-        db.session.commit()
 
-    if ViolationRecord.query.count() == 0:
-        excel_path = os.path.join(BASE_DIR, '..', 'Danh Sách Vi Phạm .xlsm')
-        import_excel_if_needed(excel_path, db, ErrorCode, ViolationRecord)
-        db.session.commit()
+# Columns added to ``users`` after the first release.  ``create_all`` never
+# alters existing tables, so older databases are upgraded in place.
+LEGACY_USER_COLUMNS = (
+    ('student_name', 'VARCHAR(128)'),
+    ('avatar_path', 'VARCHAR(256)'),
+    ('bio', 'VARCHAR(512)'),
+)
+
+
+# Indexes superseded by wider ones declared on the models.
+OBSOLETE_INDEXES = ('ix_vr_student_week_code',)
 
+
+def upgrade_legacy_schema() -> None:
+    """
+    Add any of ``LEGACY_USER_COLUMNS`` missing from the ``users`` table.
+    Up-to-date databases only pay for one empty ``SELECT`` instead of a
+    schema inspection on every start.
+    """
+    names = ', '.join(name for name, _ in LEGACY_USER_COLUMNS)
+    try:
+        with db.engine.connect() as conn:
+            conn.execute(db.text(f'SELECT {names} FROM users LIMIT 0'))
+        return
+    except DBAPIError:
+        pass
+    existing_cols = {c['name'] for c in db.inspect(db.engine).get_columns('users')}
+    with db.engine.begin() as conn:
+        for name, type_ in LEGACY_USER_COLUMNS:
+            if name not in existing_cols:
+                conn.execute(db.text(f'ALTER TABLE users ADD COLUMN {name} {type_}'))
+
+
+def table_is_empty(model) -> bool:
+    """Return ``True`` when ``model``'s table has no rows (``EXISTS`` probe)."""
+    return not db.session.execute(db.select(db.select(model).exists())).scalar()
+
+
+def initialise_database() -> None:
     """
     Ensures the database tables exist and imports the Excel data on the
     first run.  If ``database.db`` already contains violation records
     the import step is skipped.
     """
     db.create_all()
-    # Ensure new columns (such as student_name, avatar_path and bio) exist.
-    # SQLite does not automatically add columns on model changes, so
-    # perform a manual ALTER if necessary.
-    insp = db.inspect(db.engine)
-    existing_cols = [c['name'] for c in insp.get_columns('users')]
-    with db.engine.connect() as conn:
-        if 'student_name' not in existing_cols:
-            conn.execute(db.text('ALTER TABLE users ADD COLUMN student_name VARCHAR(128)'))
-        if 'avatar_path' not in existing_cols:
-            conn.execute(db.text('ALTER TABLE users ADD COLUMN avatar_path VARCHAR(256)'))
-        if 'bio' not in existing_cols:
-            conn.execute(db.text('ALTER TABLE users ADD COLUMN bio VARCHAR(512)'))
+    upgrade_legacy_schema()
+    # ``create_all`` skips tables that already exist, so indexes declared
+    # after a database was created are added here (no-op when present).
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+    with db.engine.begin() as conn:
+        for name in OBSOLETE_INDEXES:
+            conn.execute(db.text(f'DROP INDEX IF EXISTS {name}'))
     # load error codes if none exist
-    if ErrorCode.query.count() == 0:
+    if table_is_empty(ErrorCode):
         # Preload default codes based on the Excel workbook specification
         codes = [
             ('VP01', 'Đi muộn', 10000),
@@ -365,99 +785,354 @@ def initialise_database() -> None:
             ('VP05', 'Ngủ trong giờ học', 10000),
             ('VP06', 'Nghỉ học vô lí do', 30000),
         ]
-        for code, desc, amt in codes:
-            db.session.add(ErrorCode(code=code, description=desc, default_amount=amt))
+        db.session.execute(
+            db.insert(ErrorCode),
+            [{'code': code, 'description': desc, 'default_amount': amt} for code, desc, amt in codes],
+        )
         db.session.commit()
+        invalidate_error_codes()
     # import violation records if table empty
-    if ViolationRecord.query.count() == 0:
+    if table_is_empty(ViolationRecord):
         excel_path = os.path.join(BASE_DIR, '..', 'Danh Sách Vi Phạm .xlsm')
         import_excel_if_needed(excel_path, db, ErrorCode, ViolationRecord)
         db.session.commit()
+        invalidate_dashboard()
 
     # Ensure a visit counter row exists.  The VisitCount table
     # maintains a single record that stores the total number of page
     # visits.  If there are no rows present we insert one.
-    if VisitCount.query.count() == 0:
+    if table_is_empty(VisitCount):
         vc = VisitCount(count=0)
         db.session.add(vc)
         db.session.commit()
+    if redis_client is not None:
+        try:
+            seed_redis_visit_count()
+        except redis.RedisError:
+            pass
+
+    create_student_name_search()
 
     # Load DS_LOP names and store in app config for later use (payment selection)
     excel_path = os.path.join(BASE_DIR, '..', 'Danh Sách Vi Phạm .xlsm')
     try:
-        app.config['DS_LOP_NAMES'] = get_ds_lop_names(excel_path)
+        app.config['DS_LOP_NAMES'] = load_ds_lop_names(excel_path, DS_LOP_SNAPSHOT_PATH)
     except Exception:
         app.config['DS_LOP_NAMES'] = []
 
     # Make format_currency globally available to all templates
     app.jinja_env.globals.update(format_currency=format_currency)
+    # Compile every template now rather than on each one's first request.
+    for template_name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(template_name)
+
+
+_database_ready = False
+_database_lock = threading.Lock()
+
+
+def ensure_database() -> None:
+    """
+    Run ``initialise_database`` once per process.  Importing the module
+    stays cheap; the work happens on the first request, or ahead of time
+    with ``flask --app violation_web.app init-db``.
+    """
+    global _database_ready
+    if _database_ready:
+        return
+    with _database_lock:
+        if not _database_ready:
+            initialise_database()
+            _database_ready = True
+
+
+@app.before_request
+def initialise_on_first_request() -> None:
+    ensure_database()
+
+
+@app.cli.command('init-db')
+def init_db_command() -> None:
+    """Create the tables and import the workbook, then exit."""
+    ensure_database()
+    print('Database initialised.')
 
 
 # -----------------------------------------------------------------------------
 # Routes
 # -----------------------------------------------------------------------------
 
+@cache.memoize(timeout=DASHBOARD_CACHE_TIMEOUT)
+def compute_dashboard(current_week: int) -> dict:
+    """
+    Compute the record-derived part of the home page: total fines, the
+    number of violations in ``current_week``, the per-week chart series
+    and the current week's per-student summary.  The result is identical
+    for every visitor, so it is memoized and dropped by
+    ``invalidate_dashboard()`` whenever violation records change.
+    """
+    # Compute financial totals: we use dynamic penalty calculation for
+    # repeated offences of VP01 and VP06.  For each student, week and
+    # error code we add 10,000 VND for each additional occurrence in
+    # that week.  Rather than loading every record we let the database
+    # count the occurrences per (student, week, code); a group of ``n``
+    # incremental offences then costs ``base*n + 10000*n*(n-1)/2``.
+    error_defaults = get_error_defaults()
+    group_counts = db.session.execute(
+        db.select(ViolationRecord.error_code, func.count())
+        .group_by(ViolationRecord.student_name, ViolationRecord.week, ViolationRecord.error_code)
+    ).all()
+    total_fines = 0
+    for code, n in group_counts:
+        total_fines += error_defaults.get(code, 0) * n
+        if code in ('VP01', 'VP06'):
+            total_fines += 10000 * n * (n - 1) // 2
+    # Number of violations per week, used both for the chart and for the
+    # "violations this week" card.
+    week_counts = db.session.execute(
+        db.select(ViolationRecord.week, func.count())
+        .group_by(ViolationRecord.week)
+        .order_by(ViolationRecord.week)
+    ).all()
+    violations_this_week = dict(week_counts).get(current_week, 0)
+    # Prepare chart data: number of violations per week across all students.
+    chart_labels = None
+    chart_values = None
+    if week_counts:
+        chart_labels = [w for w, _ in week_counts]
+        chart_values = [n for _, n in week_counts]
+    # Prepare summary table for the current week.  Each record's dynamic
+    # due is derived from its position among the student's records with
+    # the same code this week (ordered by date, then id), then summed per
+    # student in the same statement.
+    rank = func.row_number().over(
+        partition_by=(ViolationRecord.student_name, ViolationRecord.error_code),
+        order_by=(ViolationRecord.date, ViolationRecord.id),
+    )
+    base_amount = func.coalesce(ErrorCode.default_amount, 0)
+    week_rows = (
+        db.select(
+            ViolationRecord.student_name.label('student'),
+            ViolationRecord.amount_paid.label('paid'),
+            case(
+                (ViolationRecord.error_code.in_(('VP01', 'VP06')), base_amount + 10000 * (rank - 1)),
+                else_=base_amount,
+            ).label('due'),
+        )
+        .outerjoin(ErrorCode, ErrorCode.code == ViolationRecord.error_code)
+        .where(ViolationRecord.week == current_week)
+        .subquery()
+    )
+    count = func.count().label('count')
+    week_summary = [
+        {
+            'student': row.student,
+            'count': row.count,
+            'due': int(row.due),
+            'paid': int(row.paid),
+            'outstanding': int(row.outstanding),
+        }
+        for row in db.session.execute(
+            db.select(
+                week_rows.c.student,
+                count,
+                func.sum(week_rows.c.due).label('due'),
+                func.sum(week_rows.c.paid).label('paid'),
+                func.sum(case(
+                    (week_rows.c.due > week_rows.c.paid, week_rows.c.due - week_rows.c.paid),
+                    else_=0,
+                )).label('outstanding'),
+            )
+            .group_by(week_rows.c.student)
+            .order_by(count.desc(), week_rows.c.student)
+        )
+    ]
+    return {
+        'total_fines': total_fines,
+        'violations_this_week': violations_this_week,
+        'chart_labels': chart_labels,
+        'chart_values': chart_values,
+        'week_summary': week_summary,
+    }
+
+
+def dynamic_due_subquery(student_name: Optional[str] = None):
+    """
+    Return a subquery over the violation records exposing ``id``,
+    ``student_name``, ``week``, ``date``, ``error_code``, ``amount_paid``
+    and the dynamic penalty as ``due``.  Within each (student, week, error
+    code) group records are numbered by (date, id) with ``ROW_NUMBER()``;
+    repeated VP01/VP06 offences cost 10,000 VND more than the previous
+    one, every other code simply costs its default amount.  Only the
+    VP01/VP06 rows are numbered; the rest do not depend on their order and
+    are unioned in without the window sort.
+
+    Other filters must be applied to the subquery, not inside it, because
+    a record's position depends on records outside the filter.  Only
+    ``student_name`` is safe to push down since groups never span
+    students.
+    """
+    incremental = ViolationRecord.error_code.in_(('VP01', 'VP06'))
+    position = func.row_number().over(
+        partition_by=(ViolationRecord.student_name, ViolationRecord.week, ViolationRecord.error_code),
+        order_by=(ViolationRecord.date, ViolationRecord.id),
+    ) - 1
+    base_amt = func.coalesce(ErrorCode.default_amount, 0)
+    columns = (
+        ViolationRecord.id, ViolationRecord.student_name, ViolationRecord.week,
+        ViolationRecord.date, ViolationRecord.error_code, ViolationRecord.amount_paid,
+    )
+    numbered = (
+        db.select(*columns, (base_amt + 10000 * position).label('due'))
+        .outerjoin(ErrorCode, ErrorCode.code == ViolationRecord.error_code)
+        .where(incremental)
+    )
+    flat = (
+        db.select(*columns, base_amt.label('due'))
+        .outerjoin(ErrorCode, ErrorCode.code == ViolationRecord.error_code)
+        .where(~incremental)
+    )
+    if student_name is not None:
+        numbered = numbered.where(ViolationRecord.student_name == student_name)
+        flat = flat.where(ViolationRecord.student_name == student_name)
+    query = union_all(numbered, flat)
+    return query.subquery('dues')
+
+
+def student_dynamic_dues(student_name: str) -> dict:
+    """Map the id of each of ``student_name``'s records to its dynamic penalty."""
+    dues = dynamic_due_subquery(student_name)
+    return {rec_id: int(due) for rec_id, due in db.session.execute(db.select(dues.c.id, dues.c.due))}
+
+
+@cache.memoize(timeout=3600)
+def get_payment_qr(payment_message: str) -> str:
+    """
+    Return the base64 QR code PNG for ``payment_message``.  The message
+    fully determines the image (student, amount and codes), so it is
+    cached and shared by everyone viewing the same balance.
+    """
+    return generate_qr_code_base64(payment_message)
+
+
+def get_admin_user_ids() -> tuple:
+    """
+    Return the ids of all administrator accounts as an immutable tuple.
+    Not cached: callers insert rows referencing these ids in the same
+    transaction, and an id cached in one worker could belong to an
+    account another worker has since deleted.
+    """
+    return tuple(db.session.execute(
+        db.select(User.id).where(User.is_admin.is_(True)).order_by(User.id)
+    ).scalars())
+
+
+def cache_is_local() -> bool:
+    """
+    ``True`` when the cache lives in this worker's memory (no Redis), so
+    ``delete_memoized`` cannot reach the copies held by other workers.
+    """
+    return redis_client is None
+
+
+@cache.memoize(timeout=60, unless=cache_is_local)
+def get_payment_history(user_id: int) -> list:
+    """
+    Return ``user_id``'s payments, newest first, as plain dicts so the
+    result can be cached.  ``confirm_payment`` drops the entry for the
+    paying user.  Only cached in Redis: a per-worker copy would keep
+    showing the old history on workers other than the one that took the
+    payment.
+    """
+    rows = db.session.execute(
+        db.select(Payment.amount, Payment.error_code, Payment.transfer_date, Payment.note)
+        .where(Payment.user_id == user_id)
+        .order_by(Payment.transfer_date.desc())
+    ).all()
+    return [dict(row._mapping) for row in rows]
+
+
+@cache.memoize(timeout=DASHBOARD_CACHE_TIMEOUT)
+def get_summary_filter_options() -> tuple:
+    """Return the distinct weeks and student names for the summary filters."""
+    weeks = list(db.session.execute(
+        db.select(ViolationRecord.week).distinct().order_by(ViolationRecord.week)
+    ).scalars())
+    students = list(db.session.execute(
+        db.select(ViolationRecord.student_name).distinct().order_by(ViolationRecord.student_name)
+    ).scalars())
+    return weeks, students
+
+
+# Seconds a prior offence count (and the amount API response built from
+# it) may be reused.
+AMOUNT_API_MAX_AGE = 5
+
+
+# Built once; each call only supplies the bound values.
+_PRIOR_OFFENCE_COUNT = db.select(func.count()).select_from(ViolationRecord).where(
+    ViolationRecord.student_name == db.bindparam('student_name'),
+    ViolationRecord.error_code == db.bindparam('error_code'),
+    ViolationRecord.week == db.bindparam('week'),
+)
+
+
+@cache.memoize(timeout=AMOUNT_API_MAX_AGE)
+def count_prior_offences(student_name: str, error_code: str, week: int) -> int:
+    """
+    Return how many ``error_code`` violations ``student_name`` already has
+    in ``week``.  The add-violation form asks for this on every field
+    change, so answers are kept for a few seconds.
+    """
+    return db.session.execute(
+        _PRIOR_OFFENCE_COUNT,
+        {'student_name': student_name, 'error_code': error_code, 'week': week},
+    ).scalar_one()
+
+
+def invalidate_dashboard() -> None:
+    """
+    Forget the memoized record-derived data (dashboard, summary filters,
+    prior offence counts).
+    """
+    cache.delete_memoized(compute_dashboard)
+    cache.delete_memoized(get_summary_filter_options)
+    cache.delete_memoized(count_prior_offences)
+
+
+# Images shown in the home page gallery, in display order.  The static
+# folder is listed once at import time rather than stat'ed per request.
+GALLERY_IMAGES = ('design1.png', 'design2.png', 'design3.png')
+try:
+    with os.scandir(os.path.join(BASE_DIR, 'static', 'images')) as _entries:
+        _AVAILABLE_GALLERY = frozenset(entry.name for entry in _entries if entry.is_file())
+except OSError:
+    _AVAILABLE_GALLERY = frozenset()
+
+
 @app.route('/')
 def index() -> str:
     # Increment visit count once per session on the home page
     increment_visit()
     user = get_current_user()
     outstanding = None
-    # Determine local date/time in Asia/Bangkok (UTC+7) for week and other calculations
-    # Instead of using UTC we offset by 7 hours.  This ensures week numbers
-    # and dates reflect the Hanoi timezone.
-    now_local = datetime.utcnow() + timedelta(hours=7)
-    today_local = now_local.date()
     # compute outstanding debt for the logged in user if they have
     # associated a student name.  This value is used to prompt
     # individuals to pay outstanding fines on the home page.
     if user and user.student_name:
-        records = ViolationRecord.query.filter_by(student_name=user.student_name).all()
-        outstanding = sum(r.unpaid_amount() for r in records)
+        outstanding = get_outstanding(user.student_name)
     # Total number of students: fixed at 35 or number of names in DS_LOP
     try:
         ds_names = app.config.get('DS_LOP_NAMES', [])
         total_students = max(35, len(ds_names))
     except Exception:
         total_students = 35
-    # Compute financial totals: we use dynamic penalty calculation for
-    # repeated offences of VP01 and VP06.  For each student, week and
-    # error code we add 10,000 VND for each additional occurrence in
-    # that week.  The total fines equal the sum of these dynamic due
-    # amounts across all records; total paid is the sum of amount_paid,
-    # and outstanding is the difference.
-    all_records = ViolationRecord.query.all()
-    from collections import defaultdict
-    # Precompute default amounts for error codes
-    error_defaults = {e.code: e.default_amount for e in ErrorCode.query.all()}
-    # Build dynamic due map for all records
-    dynamic_due_map: dict[int, int] = {}
-    # Group by student, week and error code
-    per_key: defaultdict[tuple, list] = defaultdict(list)
-    for rec in all_records:
-        per_key[(rec.student_name, rec.week, rec.error_code)].append(rec)
-    for (student_name, wk, code), rec_list in per_key.items():
-        rec_list_sorted = sorted(rec_list, key=lambda x: (x.date, x.id))
-        base_amount = error_defaults.get(code, 0)
-        for idx, rr in enumerate(rec_list_sorted):
-            if code in ('VP01', 'VP06'):
-                dyn_due = base_amount + 10000 * idx
-            else:
-                dyn_due = base_amount
-            dynamic_due_map[rr.id] = dyn_due
-    # Calculate totals using dynamic due map
-    overall_total_due = sum(dynamic_due_map.get(r.id, r.amount_due) for r in all_records)
-    overall_total_paid = sum(r.amount_paid for r in all_records)
-    overall_total_outstanding = overall_total_due - overall_total_paid
-    total_fines = overall_total_due
     # Determine the current week number using the custom calendar (start from
-    # 8 Sept 2025 and skip the Tết break).  Use local date for week calculation.
-    from .utils import compute_custom_week
-    current_week = compute_custom_week(today_local)
-    violations_this_week = ViolationRecord.query.filter_by(week=current_week).count()
+    # 8 Sept 2025 and skip the Tết break), based on the local Hanoi date.
+    current_week = get_current_week()
+    dashboard = compute_dashboard(current_week)
     # Retrieve total page visits from the VisitCount table.
-    vc = VisitCount.query.first()
-    total_visits = vc.count if vc else 0
+    total_visits = get_visit_count() or 0
     # Build metrics for dashboard
     metrics = [
         {
@@ -469,13 +1144,13 @@ def index() -> str:
         {
             'icon': '📄',
             'label': f'Số Vi Phạm Tuần {current_week}',
-            'value': violations_this_week,
+            'value': dashboard['violations_this_week'],
             'color': '#f87171'
         },
         {
             'icon': '💸',
             'label': 'Tổng Tiền Phạt',
-            'value': format_currency(total_fines),
+            'value': format_currency(dashboard['total_fines']),
             'color': '#facc15'
         },
         {
@@ -485,80 +1160,43 @@ def index() -> str:
             'color': '#fb923c'
         }
     ]
-    # Prepare chart data: number of violations per week across all students.
-    chart_labels = None
-    chart_values = None
-    if all_records:
-        from collections import defaultdict
-        week_counts = defaultdict(int)
-        for rec in all_records:
-            week_counts[rec.week] += 1
-        sorted_weeks = sorted(week_counts.keys())
-        chart_labels = [w for w in sorted_weeks]
-        chart_values = [week_counts[w] for w in sorted_weeks]
-    # Prepare summary table for the current week
-    week_summary = []
-    current_week_records = ViolationRecord.query.filter_by(week=current_week).all()
-    if current_week_records:
-        from collections import defaultdict
-        tmp = defaultdict(list)
-        for rec in current_week_records:
-            tmp[rec.student_name].append(rec)
-        for student_name, recs in tmp.items():
-            count = len(recs)
-            # Compute dynamic due/outstanding for this student's records in the current week
-            dyn_due_map: dict[int, int] = {}
-            dyn_out_map: dict[int, int] = {}
-            per_code: defaultdict[str, list] = defaultdict(list)
-            for r in recs:
-                per_code[r.error_code].append(r)
-            for code, rec_list in per_code.items():
-                sorted_list = sorted(rec_list, key=lambda x: (x.date, x.id))
-                base = error_defaults.get(code, 0)
-                for idx, rr in enumerate(sorted_list):
-                    if code in ('VP01', 'VP06'):
-                        ddue = base + 10000 * idx
-                    else:
-                        ddue = base
-                    dyn_due_map[rr.id] = ddue
-                    out_amt = ddue - rr.amount_paid
-                    dyn_out_map[rr.id] = out_amt if out_amt > 0 else 0
-            due = sum(dyn_due_map.get(r.id, r.amount_due) for r in recs)
-            paid = sum(r.amount_paid for r in recs)
-            outstanding_amt = sum(dyn_out_map.get(r.id, r.unpaid_amount()) for r in recs)
-            week_summary.append({
-                'student': student_name,
-                'count': count,
-                'due': due,
-                'paid': paid,
-                'outstanding': outstanding_amt
-            })
-        week_summary = sorted(week_summary, key=lambda x: x['count'], reverse=True)
     # Select fixed images for the home page gallery.  We no longer
     # randomise the gallery; instead we choose a curated set of images
     # (design1, design2, design3) so that the layout remains consistent.
-    gallery_imgs = []
-    try:
-        image_dir = os.path.join(BASE_DIR, 'static', 'images')
-        # list of preferred images in order
-        preferred = ['design1.png', 'design2.png', 'design3.png']
-        for img in preferred:
-            if os.path.exists(os.path.join(image_dir, img)):
-                gallery_imgs.append(img)
-    except Exception:
-        gallery_imgs = []
-    return render_template(
+    gallery_imgs = [img for img in GALLERY_IMAGES if img in _AVAILABLE_GALLERY]
+    # Anonymous visitors all see the same page, so it can be revalidated
+    # with an ETag instead of being rendered again.  The visit counter only
+    # contributes in steps of 100 so the tag does not change on every hit.
+    # Pages carrying flashed messages are always rendered.
+    etag = None
+    if user is None and '_flashes' not in session:
+        etag = hashlib.sha1(repr((
+            current_week, total_students, total_visits // 100, gallery_imgs,
+            sorted(dashboard.items()),
+        )).encode('utf-8')).hexdigest()
+        if etag in request.if_none_match:
+            response = app.make_response(('', 304))
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+    response = app.make_response(render_template(
         'index.html',
         user=user,
         outstanding=outstanding,
         metrics=metrics,
-        chart_labels=chart_labels,
-        chart_values=chart_values,
-        week_summary=week_summary,
+        chart_labels=dashboard['chart_labels'],
+        chart_values=dashboard['chart_values'],
+        week_summary=dashboard['week_summary'],
         current_week=current_week,
-        breadcrumbs=[{'label': 'Trang Chủ', 'url': url_for('index')}],
+        breadcrumbs=[{'label': 'Trang Chủ', 'url': page_url('index')}],
         gallery_imgs=gallery_imgs
-    )
+    ))
+    if etag is not None:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+    else:
+        response.headers['Cache-Control'] = 'private, max-age=0'
+    return response
 
 
 @app.route('/register', methods=['GET', 'POST'])
@@ -586,11 +1224,13 @@ def register() -> str:
         user = User(display_name=display_name, username=username, email=email)
         user.set_password(password)
         db.session.add(user)
-        db.session.commit()
-        # Create a welcome notification for the new user
+        db.session.flush()
+        # Create a welcome notification for the new user in the same commit
         welcome_msg = f'Chào mừng {display_name}! Tài khoản của bạn đã được tạo thành công.'
-        note = Notification(user_id=user.id, message=welcome_msg, url=url_for('index'))
-        db.session.add(note)
+        db.session.execute(
+            db.insert(Notification),
+            [{'user_id': user.id, 'message': welcome_msg, 'url': url_for('index')}],
+        )
         db.session.commit()
         flash('Tạo tài khoản thành công. Bạn có thể đăng nhập.', 'success')
         return redirect(url_for('login'))
@@ -627,131 +1267,137 @@ def summary() -> str:
     day_str = request.args.get('day')
     student = request.args.get('student')
     error = request.args.get('error_code')
-    # build base query applying filters on fields except payment status.  We will
-    # apply payment status after computing dynamic penalties so that the
-    # comparison is based on the true amount due rather than the static
-    # ``amount_due`` field.  Start with all records and narrow down.
-    query = ViolationRecord.query
+    # Filters are applied on top of the dynamic penalty subquery so that
+    # the payment status can be compared against the true amount due
+    # rather than the static ``amount_due`` field.
+    dues = dynamic_due_subquery()
+    conditions = []
     # Filter by week number
     if week_str:
         try:
             w = int(week_str)
-            query = query.filter_by(week=w)
+            conditions.append(dues.c.week == w)
         except ValueError:
             pass
     # Filter by exact date
     if day_str:
         try:
             date_filter = datetime.strptime(day_str, '%Y-%m-%d').date()
-            query = query.filter_by(date=date_filter)
+            conditions.append(dues.c.date == date_filter)
         except ValueError:
             pass
     # Filter by student name
     if student:
-        # use case-insensitive match for convenience
-        query = query.filter(ViolationRecord.student_name.ilike(f'%{student}%'))
+        # use case-insensitive match for convenience.  With the trigram
+        # index available the substring match is answered from it; terms
+        # shorter than one trigram cannot use it and scan instead.
+        if app.config.get('STUDENT_NAME_FTS') and len(student) >= 3:
+            matching_ids = db.text(
+                'SELECT rowid FROM vr_fts WHERE student_name LIKE :pattern'
+            ).bindparams(pattern=f'%{student}%').columns(db.column('rowid'))
+            conditions.append(dues.c.id.in_(matching_ids))
+        else:
+            conditions.append(dues.c.student_name.ilike(f'%{student}%'))
     # Filter by error code
     if error:
-        query = query.filter_by(error_code=error)
-
-    # At this point we have a base set of records matching week/date/student/error.
-    # We now need to compute dynamic penalties across **all** violation records
-    # so that repeated offences (VP01 and VP06) accrue extra fines.  The
-    # dynamic penalty does not depend on the filter, so we compute it for
-    # every record in the database.  Afterwards we will apply the payment
-    # status filter (paid/unpaid) using this dynamic penalty.
-    all_recs = ViolationRecord.query.all()
-    # Precompute default penalty for each error code
-    error_defaults = {e.code: e.default_amount for e in ErrorCode.query.all()}
-    from collections import defaultdict
-    # Compute dynamic due for each record across the entire dataset
-    dynamic_due_all: dict[int, int] = {}
-    # Group all records by (student, week, error code)
-    per_key_all: defaultdict[tuple, list] = defaultdict(list)
-    for rec in all_recs:
-        per_key_all[(rec.student_name, rec.week, rec.error_code)].append(rec)
-    for (stu, wk, code), rec_list in per_key_all.items():
-        sorted_list = sorted(rec_list, key=lambda r: (r.date, r.id))
-        base_amt = error_defaults.get(code, 0)
-        for idx, rr in enumerate(sorted_list):
-            if code in ('VP01', 'VP06'):
-                dynamic_due_all[rr.id] = base_amt + 10000 * idx
-            else:
-                dynamic_due_all[rr.id] = base_amt
-    # Now fetch the filtered records from the base query
-    if not user and not week_str:
-        # If not logged in, require a week selection
-        flash('Bạn phải chọn tuần để xem dữ liệu nếu chưa đăng nhập.', 'info')
-        preliminary_records = []
-    else:
-        preliminary_records = query.order_by(ViolationRecord.date.desc()).all()
+        conditions.append(dues.c.error_code == error)
     # Apply payment status filter based on dynamic penalties
     status = request.args.get('status')
-    records = []
     if status == 'paid':
         # include only records where dynamic due is less than or equal to amount_paid
-        records = [r for r in preliminary_records if dynamic_due_all.get(r.id, r.amount_due) <= r.amount_paid]
+        conditions.append(dues.c.due <= dues.c.amount_paid)
     elif status == 'unpaid':
         # include only records where dynamic due is greater than amount_paid
-        records = [r for r in preliminary_records if dynamic_due_all.get(r.id, r.amount_due) > r.amount_paid]
+        conditions.append(dues.c.due > dues.c.amount_paid)
+
+    page = max(request.args.get('page', 1, type=int), 1)
+    size = min(max(request.args.get('size', SUMMARY_STUDENTS_PER_PAGE, type=int), 1), 200)
+    has_next = False
+    page_totals = []
+    records = []
+    overall_total_due = 0
+    overall_total_paid = 0
+    overall_total_outstanding = 0
+    if not user and not week_str:
+        # If not logged in, require a week selection
+        flash('Bạn phải chọn tuần để xem dữ liệu nếu chưa đăng nhập.', 'info')
     else:
-        records = preliminary_records
+        outstanding_col = case((dues.c.due > dues.c.amount_paid, dues.c.due - dues.c.amount_paid), else_=0)
+        # Students are listed in the order they first appear among the
+        # filtered records (newest first), one page of students at a time.
+        filtered = db.select(
+            dues,
+            func.row_number().over(order_by=(dues.c.date.desc(), dues.c.id)).label('pos'),
+        ).where(*conditions).subquery('filtered')
+        # Fetch one extra student to know whether a next page exists.
+        page_totals = db.session.execute(
+            db.select(
+                filtered.c.student_name,
+                func.count().label('total_count'),
+                func.sum(filtered.c.due).label('total_due'),
+                func.sum(filtered.c.amount_paid).label('total_paid'),
+                func.sum(case(
+                    (filtered.c.due > filtered.c.amount_paid, filtered.c.due - filtered.c.amount_paid),
+                    else_=0,
+                )).label('total_outstanding'),
+            )
+            .group_by(filtered.c.student_name)
+            .order_by(func.min(filtered.c.pos))
+            .limit(size + 1)
+            .offset((page - 1) * size)
+        ).all()
+        has_next = len(page_totals) > size
+        page_totals = page_totals[:size]
+        if page_totals:
+            records = (
+                ViolationRecord.query.join(dues, dues.c.id == ViolationRecord.id)
+                .options(joinedload(ViolationRecord.error))
+                .filter(*conditions, dues.c.student_name.in_([row.student_name for row in page_totals]))
+                .order_by(ViolationRecord.student_name, ViolationRecord.date, ViolationRecord.id)
+                .all()
+            )
+        # The fund totals cover every matching record, not just this page.
+        overall = db.session.execute(
+            db.select(
+                func.coalesce(func.sum(dues.c.due), 0),
+                func.coalesce(func.sum(dues.c.amount_paid), 0),
+                func.coalesce(func.sum(outstanding_col), 0),
+            ).where(*conditions)
+        ).one()
+        # Postgres returns NUMERIC for these sums; keep plain ints
+        overall_total_due, overall_total_paid, overall_total_outstanding = (int(v) for v in overall)
     # Gather unique values for filters
-    all_recs = ViolationRecord.query.all()
-    weeks = sorted({r.week for r in all_recs})
-    students = sorted({r.student_name for r in all_recs})
-    errors = ErrorCode.query.all()
-    # Precompute default penalty for each error code (for display descriptions)
-    error_defaults = {e.code: e.default_amount for e in errors}
-    error_dict = {e.code: e.description for e in errors}
-    # Group filtered records by student and compute totals using dynamic penalties
+    weeks, students = get_summary_filter_options()
+    errors = list(get_error_codes().values())
+    # Group this page's records (already in date order) by student;
+    # totals come from the aggregate
     from collections import defaultdict
     grouped: defaultdict[str, list] = defaultdict(list)
     for rec in records:
         grouped[rec.student_name].append(rec)
     grouped_records = []
-    overall_total_due = 0
-    overall_total_paid = 0
-    overall_total_outstanding = 0
-    for student_name, recs in grouped.items():
-        total_count = len(recs)
-        total_due = 0
-        total_paid = 0
-        total_outstanding = 0
-        enumerated_records = []
-        for idx, rec in enumerate(sorted(recs, key=lambda r: (r.date, r.id))):
-            # Use the globally computed dynamic penalty for this record
-            dyn_due = dynamic_due_all.get(rec.id, rec.amount_due)
-            outstanding = dyn_due - rec.amount_paid
-            if outstanding < 0:
-                outstanding = 0
-            total_due += dyn_due
-            total_paid += rec.amount_paid
-            total_outstanding += outstanding
-            enumerated_records.append({'index': idx + 1, 'record': rec})
-        overall_total_due += total_due
-        overall_total_paid += total_paid
-        overall_total_outstanding += total_outstanding
+    for row in page_totals:
         grouped_records.append({
-            'student': student_name,
-            'records': enumerated_records,
-            'total_count': total_count,
-            'total_due': total_due,
-            'total_paid': total_paid,
-            'total_outstanding': total_outstanding,
+            'student': row.student_name,
+            'records': grouped[row.student_name],
+            'total_count': row.total_count,
+            'total_due': int(row.total_due),
+            'total_paid': int(row.total_paid),
+            'total_outstanding': int(row.total_outstanding),
         })
     return render_template(
         'summary.html', user=user, groups=grouped_records, weeks=weeks,
         students=students, errors=errors, selected_week=week_str,
         selected_day=day_str, selected_student=student, selected_error=error,
-        format_currency=format_currency, error_dict=error_dict,
+        format_currency=format_currency,
         overall_total_due=overall_total_due,
         overall_total_paid=overall_total_paid,
         overall_total_outstanding=overall_total_outstanding,
         selected_status=status,
+        page=page, has_next=has_next,
         breadcrumbs=[
-            {'label': 'Trang Chủ', 'url': url_for('index')},
-            {'label': 'Bảng Tổng Hợp', 'url': url_for('summary')}
+            {'label': 'Trang Chủ', 'url': page_url('index')},
+            {'label': 'Bảng Tổng Hợp', 'url': page_url('summary')}
         ]
     )
 
@@ -760,12 +1406,15 @@ def summary() -> str:
 @login_required
 def complaint(record_id: int) -> str:
     user = get_current_user()
-    record: Optional[ViolationRecord] = ViolationRecord.query.get_or_404(record_id)
+    record: ViolationRecord = db.get_or_404(ViolationRecord, record_id)
     if request.method == 'POST':
         error_code = request.form.get('error_code') or record.error_code
+        error_obj = get_error_codes().get(error_code)
         email = request.form.get('email', '').strip()
         message = request.form.get('message', '').strip()
-        if not email or not message:
+        if error_obj is None:
+            flash('Mã lỗi không hợp lệ.', 'danger')
+        elif not email or not message:
             flash('Vui lòng nhập email và nội dung khiếu nại.', 'danger')
         else:
             comp = Complaint(
@@ -773,7 +1422,7 @@ def complaint(record_id: int) -> str:
                 violation_id=record.id,
                 error_code=error_code,
                 target_student=record.student_name,
-                target_error=ErrorCode.query.get(error_code).description,
+                target_error=error_obj.description,
                 complaint_email=email,
                 message=message
             )
@@ -782,12 +1431,12 @@ def complaint(record_id: int) -> str:
             flash('Đã gửi khiếu nại. Quản trị viên sẽ xem xét.', 'success')
             return redirect(url_for('summary'))
     # possible error codes for complaint list
-    codes = ErrorCode.query.all()
+    codes = list(get_error_codes().values())
     return render_template(
         'complaint.html', user=user, record=record, codes=codes,
         breadcrumbs=[
-            {'label': 'Trang Chủ', 'url': url_for('index')},
-            {'label': 'Bảng Tổng Hợp', 'url': url_for('summary')},
+            {'label': 'Trang Chủ', 'url': page_url('index')},
+            {'label': 'Bảng Tổng Hợp', 'url': page_url('summary')},
             {'label': 'Khiếu Nại', 'url': url_for('complaint', record_id=record_id)}
         ]
     )
@@ -830,7 +1479,7 @@ def pay(username: str) -> str:
             return render_template(
                 'pay_select.html', user=current_user, names=ds_names, admin_select=True,
                 breadcrumbs=[
-                    {'label': 'Trang Chủ', 'url': url_for('index')},
+                    {'label': 'Trang Chủ', 'url': page_url('index')},
                     {'label': 'Nộp Tiền', 'url': url_for('pay', username=username)}
                 ]
             )
@@ -852,46 +1501,28 @@ def pay(username: str) -> str:
             return render_template(
                 'pay_select.html', user=current_user, names=ds_names, admin_select=False,
                 breadcrumbs=[
-                    {'label': 'Trang Chủ', 'url': url_for('index')},
+                    {'label': 'Trang Chủ', 'url': page_url('index')},
                     {'label': 'Nộp Tiền', 'url': url_for('pay', username=username)}
                 ]
             )
         # Normal user uses their saved student name
         student_name = target_user.student_name
-    # Compute total unpaid using dynamic penalties.  For each record,
-    # determine the dynamic due amount based on how many times the student
-    # has committed the same violation within the same week.  Sum the
-    # outstanding amounts (dynamic due minus amount_paid) across all
-    # records for this student.  Also collect the list of error codes
-    # where there is an outstanding balance.
-    records = ViolationRecord.query.filter_by(student_name=student_name).all()
-    # Compute dynamic due for all records across the database
-    all_recs = ViolationRecord.query.all()
-    error_defaults = {e.code: e.default_amount for e in ErrorCode.query.all()}
-    from collections import defaultdict
-    dynamic_due_all: dict[int, int] = {}
-    per_key_all: defaultdict[tuple, list] = defaultdict(list)
-    for rec in all_recs:
-        per_key_all[(rec.student_name, rec.week, rec.error_code)].append(rec)
-    for (stu, wk, code), rec_list in per_key_all.items():
-        sorted_list = sorted(rec_list, key=lambda r: (r.date, r.id))
-        base_amt = error_defaults.get(code, 0)
-        for idx, rr in enumerate(sorted_list):
-            if code in ('VP01', 'VP06'):
-                dynamic_due_all[rr.id] = base_amt + 10000 * idx
-            else:
-                dynamic_due_all[rr.id] = base_amt
-    total_unpaid = 0
-    codes_set = set()
-    for rec in records:
-        dyn_due = dynamic_due_all.get(rec.id, rec.amount_due)
-        outstanding_amt = dyn_due - rec.amount_paid
-        if outstanding_amt > 0:
-            total_unpaid += outstanding_amt
-            codes_set.add(rec.error_code)
-    codes = sorted(codes_set)
+    # Compute total unpaid using dynamic penalties.  The outstanding amount
+    # of each record (dynamic due minus amount_paid, ignoring overpaid
+    # records) is summed per error code in SQL; only codes with an
+    # outstanding balance are returned.
+    dues = dynamic_due_subquery(student_name)
+    outstanding_col = func.sum(case((dues.c.due > dues.c.amount_paid, dues.c.due - dues.c.amount_paid), else_=0))
+    outstanding_rows = db.session.execute(
+        db.select(dues.c.error_code, outstanding_col.label('outstanding'))
+        .group_by(dues.c.error_code)
+        .having(outstanding_col > 0)
+        .order_by(dues.c.error_code)
+    ).all()
+    total_unpaid = sum(int(row.outstanding) for row in outstanding_rows)
+    codes = [row.error_code for row in outstanding_rows]
     payment_message = generate_payment_message(student_name, total_unpaid, codes)
-    qr_image = generate_qr_code_base64(payment_message)
+    qr_image = get_payment_qr(payment_message)
     instructions = [
         'Bước 1: Quét mã QR bên cạnh bằng ứng dụng Momo hoặc ngân hàng. Bạn cũng có thể truy cập trực tiếp bằng liên kết: https://quy.momo.vn/v2/AJB9sUnYjt',
         'Bước 2: Nhập nội dung chuyển khoản theo mẫu: Họ và tên + Số tiền nộp + Mã lỗi (Nếu nhiều mã giống nhau chỉ ghi một lần).',
@@ -903,7 +1534,7 @@ def pay(username: str) -> str:
         instructions=instructions, student_name=student_name,
         admin_select=current_user.is_admin,
         breadcrumbs=[
-            {'label': 'Trang Chủ', 'url': url_for('index')},
+            {'label': 'Trang Chủ', 'url': page_url('index')},
             {'label': 'Nộp Tiền', 'url': url_for('pay', username=username)}
         ]
     )
@@ -950,22 +1581,10 @@ def confirm_payment(username: str) -> str:
     any_updated = False
     total_unpaid = 0
     codes_set = set()
-    # Compute dynamic due amounts for all records across the database
-    all_recs = ViolationRecord.query.all()
-    error_defaults = {e.code: e.default_amount for e in ErrorCode.query.all()}
-    from collections import defaultdict
-    dynamic_due_all: dict[int, int] = {}
-    per_key_all: defaultdict[tuple, list] = defaultdict(list)
-    for rec_all in all_recs:
-        per_key_all[(rec_all.student_name, rec_all.week, rec_all.error_code)].append(rec_all)
-    for (stu, wk, code), rec_list in per_key_all.items():
-        sorted_list = sorted(rec_list, key=lambda r: (r.date, r.id))
-        base_amt = error_defaults.get(code, 0)
-        for idx, rrr in enumerate(sorted_list):
-            if code in ('VP01', 'VP06'):
-                dynamic_due_all[rrr.id] = base_amt + 10000 * idx
-            else:
-                dynamic_due_all[rrr.id] = base_amt
+    # Dynamic due amounts for this student's records
+    dynamic_due_all = student_dynamic_dues(student_name)
+    # Payment dates and the transfer time use local (GMT+7) time
+    now_local = local_now()
     for rec in records:
         # compute dynamic due for this record
         dyn_due = dynamic_due_all.get(rec.id, rec.amount_due)
@@ -975,8 +1594,7 @@ def confirm_payment(username: str) -> str:
             codes_set.add(rec.error_code)
             # Mark record as fully paid (set amount_paid equal to dynamic due)
             rec.amount_paid = dyn_due
-            # Record the payment date in local (GMT+7) timezone
-            rec.payment_date = (datetime.utcnow() + timedelta(hours=7)).date()
+            rec.payment_date = now_local.date()
             any_updated = True
     if any_updated:
         codes_list = sorted(codes_set)
@@ -985,55 +1603,49 @@ def confirm_payment(username: str) -> str:
         # For normal users, attribute payment to the user; for admins,
         # attribute payment to themselves since they initiated the payment.
         payment_user_id = current_user.id
-        # Use local time (UTC+7) for the transfer date
-        transfer_dt = datetime.utcnow() + timedelta(hours=7)
-        payment = Payment(
+        transfer_dt = now_local
+        # Nothing reads the payment back, so it is inserted as a plain row
+        # like the notifications below rather than as a tracked instance.
+        db.session.execute(db.insert(Payment).values(
             user_id=payment_user_id,
             amount=total_unpaid,
             error_code=', '.join(codes_list),
             note=payment_message,
-            transfer_date=transfer_dt
-        )
-        db.session.add(payment)
-        db.session.commit()
-        # update Excel file to reflect new payment amounts
-        excel_path = os.path.join(BASE_DIR, '..', 'Danh Sách Vi Phạm .xlsm')
-        try:
-            update_excel_payment(student_name, excel_path)
-        except Exception:
-            pass
-        flash('Đã ghi nhận thanh toán và cập nhật dữ liệu.', 'success')
+            transfer_date=transfer_dt,
+        ))
         # Record notifications about the payment.  Always create a note for
         # the user performing the payment so they can see this action in
         # their notification list.  Additionally, create a note for each
         # administrator so that admins know which user made a payment.
-        try:
-            # Message for the paying user uses "Bạn" to refer to themselves.
-            pay_msg_user = (
-                f'Bạn đã nộp {format_currency(total_unpaid)} cho {student_name} '
-                f'({"; ".join(codes_list) if codes_list else ""}) vào ngày '
-                f'{transfer_dt.strftime("%d/%m/%Y %H:%M")}.'
-            )
-            pay_url = url_for('history')
-            new_note_user = Notification(user_id=current_user.id, message=pay_msg_user, url=pay_url)
-            db.session.add(new_note_user)
-            # Prepare a message for administrators referencing the payer's display name
-            user_display = current_user.display_name
-            admin_message = (
-                f'{user_display} đã nộp {format_currency(total_unpaid)} cho {student_name} '
-                f'({"; ".join(codes_list) if codes_list else ""}) vào ngày '
-                f'{transfer_dt.strftime("%d/%m/%Y %H:%M")}.'
-            )
-            # Create a notification for each admin (excluding the payer themselves if they are also admin)
-            admin_users = User.query.filter_by(is_admin=True).all()
-            for admin_user in admin_users:
-                if admin_user.id == current_user.id:
-                    continue
-                note = Notification(user_id=admin_user.id, message=admin_message, url=pay_url)
-                db.session.add(note)
-            db.session.commit()
-        except Exception:
-            pass
+        # Message for the paying user uses "Bạn" to refer to themselves.
+        pay_msg_user = (
+            f'Bạn đã nộp {format_currency(total_unpaid)} cho {student_name} '
+            f'({"; ".join(codes_list) if codes_list else ""}) vào ngày '
+            f'{transfer_dt.strftime("%d/%m/%Y %H:%M")}.'
+        )
+        pay_url = url_for('history')
+        notes = [{'user_id': current_user.id, 'message': pay_msg_user, 'url': pay_url}]
+        # Prepare a message for administrators referencing the payer's display name
+        user_display = current_user.display_name
+        admin_message = (
+            f'{user_display} đã nộp {format_currency(total_unpaid)} cho {student_name} '
+            f'({"; ".join(codes_list) if codes_list else ""}) vào ngày '
+            f'{transfer_dt.strftime("%d/%m/%Y %H:%M")}.'
+        )
+        # Create a notification for each admin (excluding the payer themselves if they are also admin)
+        for admin_id in get_admin_user_ids():
+            if admin_id == current_user.id:
+                continue
+            notes.append({'user_id': admin_id, 'message': admin_message, 'url': pay_url})
+        db.session.execute(db.insert(Notification), notes)
+        # Record updates, the payment and its notifications share one commit
+        db.session.commit()
+        invalidate_dashboard()
+        cache.delete_memoized(get_payment_history, payment_user_id)
+        # update Excel file to reflect new payment amounts.  The database is
+        # the source of truth; the workbook is updated in the background.
+        queue_excel_update('pay', student_name)
+        flash('Đã ghi nhận thanh toán và cập nhật dữ liệu.', 'success')
     else:
         flash('Không có khoản nợ nào để thanh toán.', 'info')
     return redirect(url_for('pay', username=username, **({'student': student_name} if current_user.is_admin else {})))
@@ -1070,7 +1682,7 @@ def profile() -> str:
                 if new_password:
                     if new_password != new_password2:
                         flash('Mật khẩu xác nhận không khớp.', 'danger')
-                        return render_template('profile.html', user=user, breadcrumbs=[{'label':'Trang Chủ','url': url_for('index')},{'label':'Hồ Sơ','url': url_for('profile')}])
+                        return render_template('profile.html', user=user, breadcrumbs=[{'label':'Trang Chủ','url': page_url('index')},{'label':'Hồ Sơ','url': page_url('profile')}])
                     user.set_password(new_password)
                 user.display_name = new_display_name
                 user.email = new_email
@@ -1094,7 +1706,7 @@ def profile() -> str:
     return render_template(
         'profile.html',
         user=user,
-        breadcrumbs=[{'label': 'Trang Chủ', 'url': url_for('index')}, {'label': 'Hồ Sơ', 'url': url_for('profile')}]
+        breadcrumbs=[{'label': 'Trang Chủ', 'url': page_url('index')}, {'label': 'Hồ Sơ', 'url': page_url('profile')}]
     )
 
 
@@ -1102,12 +1714,12 @@ def profile() -> str:
 @login_required
 def history() -> str:
     user = get_current_user()
-    payments = Payment.query.filter_by(user_id=user.id).order_by(Payment.transfer_date.desc()).all()
+    payments = get_payment_history(user.id)
     return render_template(
         'history.html', user=user, payments=payments, format_currency=format_currency,
         breadcrumbs=[
-            {'label': 'Trang Chủ', 'url': url_for('index')},
-            {'label': 'Lịch Sử Nộp Tiền', 'url': url_for('history')}
+            {'label': 'Trang Chủ', 'url': page_url('index')},
+            {'label': 'Lịch Sử Nộp Tiền', 'url': page_url('history')}
         ]
     )
 
@@ -1127,12 +1739,22 @@ def notifications() -> str:
     notification as read.
     """
     user = get_current_user()
-    notes = Notification.query.filter_by(user_id=user.id).order_by(Notification.created_at.desc()).all()
+    page = max(request.args.get('page', 1, type=int), 1)
+    # Fetch one extra row to know whether a next page exists.
+    notes = db.session.execute(
+        db.select(Notification.id, Notification.message, Notification.is_read, Notification.created_at)
+        .where(Notification.user_id == user.id)
+        .order_by(Notification.created_at.desc())
+        .limit(NOTIFICATIONS_PER_PAGE + 1)
+        .offset((page - 1) * NOTIFICATIONS_PER_PAGE)
+    ).all()
+    has_next = len(notes) > NOTIFICATIONS_PER_PAGE
     return render_template(
-        'notifications.html', user=user, notifications=notes,
+        'notifications.html', user=user, notifications=notes[:NOTIFICATIONS_PER_PAGE],
+        page=page, has_next=has_next,
         breadcrumbs=[
-            {'label': 'Trang Chủ', 'url': url_for('index')},
-            {'label': 'Thông Báo', 'url': url_for('notifications')}
+            {'label': 'Trang Chủ', 'url': page_url('index')},
+            {'label': 'Thông Báo', 'url': page_url('notifications')}
         ]
     )
 
@@ -1168,6 +1790,17 @@ def notifications_read_all() -> str:
     return redirect(url_for('notifications'))
 
 
+# Worksheet of the original workbook that holds each error code's records
+VIOLATION_SHEETS = {
+    'VP01': 'NHAT_KI_DI_MUON',
+    'VP02': 'NG_LA',
+    'VP03': 'DOI_CHO',
+    'VP04': 'QUEN_DDHT',
+    'VP05': 'NGU_TRONG_GIO',
+    'VP06': 'NGHI_HOC',
+}
+
+
 @app.route('/violation/add', methods=['GET', 'POST'])
 @login_required
 def add_violation() -> str:
@@ -1186,7 +1819,7 @@ def add_violation() -> str:
         flash('Chỉ quản trị viên mới có thể ghi vi phạm.', 'danger')
         return redirect(url_for('summary'))
     names = app.config.get('DS_LOP_NAMES', [])
-    codes = ErrorCode.query.all()
+    codes = list(get_error_codes().values())
     if request.method == 'POST':
         student_name = request.form.get('student')
         date_str = request.form.get('date')
@@ -1197,25 +1830,22 @@ def add_violation() -> str:
         # basic validation
         if not student_name or not date_str or not error_code:
             flash('Vui lòng điền đầy đủ thông tin bắt buộc.', 'danger')
-            return render_template('add_violation.html', user=user, names=names, codes=codes)
+            return render_template(
+                'add_violation.html', user=user, names=names, codes=codes,
+                today=local_now().date(),
+            )
         try:
             record_date = datetime.strptime(date_str, '%Y-%m-%d').date()
         except Exception:
             flash('Ngày không hợp lệ.', 'danger')
-            return render_template('add_violation.html', user=user, names=names, codes=codes)
+            return render_template(
+                'add_violation.html', user=user, names=names, codes=codes,
+                today=local_now().date(),
+            )
         # compute custom week number
-        from .utils import compute_custom_week
         week = compute_custom_week(record_date)
         # map error code to sheet name
-        sheet_map = {
-            'VP01': 'NHAT_KI_DI_MUON',
-            'VP02': 'NG_LA',
-            'VP03': 'DOI_CHO',
-            'VP04': 'QUEN_DDHT',
-            'VP05': 'NGU_TRONG_GIO',
-            'VP06': 'NGHI_HOC',
-        }
-        sheet_name = sheet_map.get(error_code, '')
+        sheet_name = VIOLATION_SHEETS.get(error_code, '')
         # determine amount due
         amount_due = None
         # If user entered a custom amount, use it (remove separators)
@@ -1232,8 +1862,7 @@ def add_violation() -> str:
         # 10,000 VND on top of the base default.  For other codes we use
         # the default amount defined in ErrorCode.
         if amount_due is None:
-            code_obj = ErrorCode.query.get(error_code)
-            base_amount = code_obj.default_amount if code_obj else 0
+            base_amount = get_error_defaults().get(error_code, 0)
             # Apply incremental penalty for tardiness (VP01) and unexcused absence (VP06)
             if error_code in ('VP01', 'VP06'):
                 # Count previous occurrences of this code for the student in the same week
@@ -1260,14 +1889,6 @@ def add_violation() -> str:
             notes=notes if notes else None,
         )
         db.session.add(rec)
-        db.session.commit()
-        # append to original Excel workbook (best effort)
-        try:
-            from .utils import append_violation_to_excel
-            excel_path = os.path.join(BASE_DIR, '..', 'Danh Sách Vi Phạm .xlsm')
-            append_violation_to_excel(rec, excel_path)
-        except Exception:
-            pass
         # Create a notification for the affected student if they have an account.
         # We first look for a user whose ``student_name`` matches the record.  If
         # none exists we fall back to matching on display_name, because many
@@ -1278,41 +1899,151 @@ def add_violation() -> str:
         if not target_user:
             target_user = User.query.filter_by(display_name=student_name).first()
         if target_user:
-            error_obj = ErrorCode.query.get(error_code)
+            error_obj = get_error_codes().get(error_code)
             error_desc = error_obj.description if error_obj else error_code
             message = (
                 f'Bạn vừa bị ghi vi phạm {error_code} - {error_desc} vào ngày '
                 f'{record_date.strftime("%d/%m/%Y")}.'
             )
             url_link = url_for('summary', student=student_name)
-            note = Notification(user_id=target_user.id, message=message, url=url_link)
-            db.session.add(note)
-            db.session.commit()
+            db.session.add(Notification(user_id=target_user.id, message=message, url=url_link))
         # Also record a notification for the admin who performed the action so
         # they can see their own recent activities in the notification panel.
+        admin_msg = (
+            f'Bạn đã ghi vi phạm {error_code} cho {student_name} ngày '
+            f'{record_date.strftime("%d/%m/%Y")}.')
+        admin_url = url_for('summary', student=student_name)
+        db.session.add(Notification(user_id=user.id, message=admin_msg, url=admin_url))
+        # Snapshot for the Excel append, taken before the commit expires
+        # the instance.  The worker gets plain values, not the
+        # session-bound record.
+        snapshot = SimpleNamespace(
+            sheet_name=rec.sheet_name, week=rec.week, date=rec.date,
+            student_name=rec.student_name, reason=rec.reason,
+            amount_paid=rec.amount_paid, payment_date=rec.payment_date,
+            amount_due=rec.amount_due, notes=rec.notes,
+        )
+        # The record and its notifications are written in one transaction.
         try:
-            admin_msg = (
-                f'Bạn đã ghi vi phạm {error_code} cho {student_name} ngày '
-                f'{record_date.strftime("%d/%m/%Y")}.')
-            admin_url = url_for('summary', student=student_name)
-            admin_note = Notification(user_id=user.id, message=admin_msg, url=admin_url)
-            db.session.add(admin_note)
             db.session.commit()
         except Exception:
-            pass
+            db.session.rollback()
+            raise
+        invalidate_dashboard()
+        # append to original Excel workbook (best effort, in the background)
+        queue_excel_update('append', snapshot)
         flash('Đã thêm vi phạm thành công.', 'success')
         return redirect(url_for('summary'))
-    from datetime import datetime as dt
     return render_template(
-        'add_violation.html', user=user, names=names, codes=codes, datetime=dt,
+        'add_violation.html', user=user, names=names, codes=codes,
+        today=local_now().date(),
         breadcrumbs=[
-            {'label': 'Trang Chủ', 'url': url_for('index')},
-            {'label': 'Ghi Vi Phạm', 'url': url_for('add_violation')}
+            {'label': 'Trang Chủ', 'url': page_url('index')},
+            {'label': 'Ghi Vi Phạm', 'url': page_url('add_violation')}
         ]
     )
 
 
 
+@app.route('/violation/add_bulk', methods=['POST'])
+@login_required
+def add_violation_bulk() -> str:
+    """
+    Record the same violation (date and error code) for several students
+    at once.  Incremental VP01/VP06 penalties are priced from one grouped
+    count of the students' earlier offences that week, and all records
+    and notifications are written in a single commit.
+    """
+    user = get_current_user()
+    if not user.is_admin:
+        flash('Chỉ quản trị viên mới có thể ghi vi phạm.', 'danger')
+        return redirect(url_for('summary'))
+    students = [name for name in request.form.getlist('students') if name]
+    date_str = request.form.get('date')
+    error_code = request.form.get('error_code')
+    reason = request.form.get('reason', '').strip()
+    notes = request.form.get('notes', '').strip()
+    if not students or not date_str or not error_code:
+        flash('Vui lòng điền đầy đủ thông tin bắt buộc.', 'danger')
+        return redirect(url_for('add_violation'))
+    try:
+        record_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        flash('Ngày không hợp lệ.', 'danger')
+        return redirect(url_for('add_violation'))
+    week = compute_custom_week(record_date)
+    base_amount = get_error_defaults().get(error_code, 0)
+    # Offences already recorded this week, per student; bumped as we go so
+    # a student listed twice is priced as a repeat.
+    prior_counts: dict[str, int] = {}
+    if error_code in ('VP01', 'VP06'):
+        prior_counts = dict(db.session.execute(
+            db.select(ViolationRecord.student_name, func.count())
+            .where(
+                ViolationRecord.error_code == error_code,
+                ViolationRecord.week == week,
+                ViolationRecord.student_name.in_(students),
+            )
+            .group_by(ViolationRecord.student_name)
+        ).all())
+    rows = []
+    for student_name in students:
+        amount_due = base_amount
+        if error_code in ('VP01', 'VP06'):
+            prior_count = prior_counts.get(student_name, 0)
+            amount_due = base_amount + 10000 * prior_count
+            prior_counts[student_name] = prior_count + 1
+        rows.append({
+            'sheet_name': VIOLATION_SHEETS.get(error_code, ''),
+            'week': week,
+            'date': record_date,
+            'student_name': student_name,
+            'error_code': error_code,
+            'reason': reason if reason else None,
+            'amount_due': amount_due,
+            'amount_paid': 0,
+            'payment_date': None,
+            'notes': notes if notes else None,
+        })
+    db.session.execute(db.insert(ViolationRecord), rows)
+    # Notify students with an account, matched on student_name first and
+    # display_name second as in ``add_violation``.
+    error_obj = get_error_codes().get(error_code)
+    error_desc = error_obj.description if error_obj else error_code
+    recipients: dict[str, int] = {}
+    for user_id, display_name in db.session.execute(
+        db.select(User.id, User.display_name).where(User.display_name.in_(students))
+    ):
+        recipients.setdefault(display_name, user_id)
+    for user_id, student_name in db.session.execute(
+        db.select(User.id, User.student_name).where(User.student_name.in_(students))
+    ):
+        recipients[student_name] = user_id
+    message = (
+        f'Bạn vừa bị ghi vi phạm {error_code} - {error_desc} vào ngày '
+        f'{record_date.strftime("%d/%m/%Y")}.'
+    )
+    note_rows = [
+        {'user_id': user_id, 'message': message, 'url': url_for('summary', student=student_name)}
+        for student_name, user_id in recipients.items()
+    ]
+    note_rows.append({
+        'user_id': user.id,
+        'message': (
+            f'Bạn đã ghi vi phạm {error_code} cho {len(set(students))} học sinh ngày '
+            f'{record_date.strftime("%d/%m/%Y")}.'
+        ),
+        'url': url_for('summary', week=week),
+    })
+    db.session.execute(db.insert(Notification), note_rows)
+    db.session.commit()
+    invalidate_dashboard()
+    for row in rows:
+        queue_excel_update('append', SimpleNamespace(**row))
+    flash(f'Đã thêm {len(rows)} vi phạm.', 'success')
+    return redirect(url_for('summary', week=week))
+
+
 @app.route('/admin', methods=['GET', 'POST'])
 @login_required
 def admin() -> str:
@@ -1323,16 +2054,24 @@ def admin() -> str:
     # show all complaints and allow marking as resolved
     if request.method == 'POST':
         # handle resolving complaints
-        comp_id = request.form.get('resolve_id')
+        comp_id = request.form.get('resolve_id', type=int)
         if comp_id:
-            comp = Complaint.query.get(int(comp_id))
+            comp = db.session.get(Complaint, comp_id)
             if comp:
                 comp.resolved = True
                 db.session.commit()
                 flash('Đã đánh dấu khiếu nại là đã giải quyết.', 'success')
-    complaints = Complaint.query.order_by(Complaint.submitted_at.desc()).all()
+    # The template shows each row's user; load them all in one IN query
+    # per list instead of one lazy load per distinct user.
+    complaints = (
+        Complaint.query.options(selectinload(Complaint.user))
+        .order_by(Complaint.submitted_at.desc()).all()
+    )
     # Retrieve all payment transactions for admin overview
-    payments = Payment.query.order_by(Payment.transfer_date.desc()).all()
+    payments = (
+        Payment.query.options(selectinload(Payment.user))
+        .order_by(Payment.transfer_date.desc()).all()
+    )
     # Compute aggregate metrics for payments
     total_payment_count = len(payments)
     total_payment_amount = sum(p.amount for p in payments)
@@ -1341,12 +2080,33 @@ def admin() -> str:
         total_payment_count=total_payment_count, total_payment_amount=total_payment_amount,
         format_currency=format_currency,
         breadcrumbs=[
-            {'label': 'Trang Chủ', 'url': url_for('index')},
-            {'label': 'Quản Trị', 'url': url_for('admin')}
+            {'label': 'Trang Chủ', 'url': page_url('index')},
+            {'label': 'Quản Trị', 'url': page_url('admin')}
         ]
     )
 
 
+@app.route('/admin/reload_names', methods=['POST'])
+@login_required
+def reload_ds_lop_names() -> str:
+    """
+    Re-read the student list from the ``DS_LOP`` worksheet, bypassing the
+    JSON snapshot, and refresh the snapshot for the next start.
+    """
+    user = get_current_user()
+    if not user.is_admin:
+        flash('Truy cập bị từ chối.', 'danger')
+        return redirect(url_for('index'))
+    excel_path = os.path.join(BASE_DIR, '..', 'Danh Sách Vi Phạm .xlsm')
+    names = load_ds_lop_names(excel_path, DS_LOP_SNAPSHOT_PATH, force=True)
+    if names:
+        app.config['DS_LOP_NAMES'] = names
+        flash(f'Đã tải lại danh sách lớp ({len(names)} học sinh).', 'success')
+    else:
+        flash('Không đọc được danh sách lớp từ file Excel.', 'warning')
+    return redirect(url_for('admin'))
+
+
 # -----------------------------------------------------------------------------
 # Admin user management
 # -----------------------------------------------------------------------------
@@ -1375,36 +2135,44 @@ def admin_users() -> str:
             flash('Chỉ siêu quản trị viên mới có quyền chỉnh sửa người dùng.', 'danger')
             return redirect(url_for('admin_users'))
         action = request.form.get('action')
-        target_id = request.form.get('user_id')
+        # ``type=int`` yields None for a missing or non-numeric id.
+        target_id = request.form.get('user_id', type=int)
         if action and target_id:
-            try:
-                target_id_int = int(target_id)
-            except ValueError:
-                target_id_int = None
-            target_user = User.query.get(target_id_int) if target_id_int else None
+            target_user = db.session.get(User, target_id)
             if target_user and target_user.id != user.id:
                 if action == 'toggle_admin':
                     target_user.is_admin = not target_user.is_admin
                     db.session.commit()
                     flash(f'Đã cập nhật quyền quản trị cho {target_user.display_name}.', 'success')
                 elif action == 'delete':
-                    # Remove related objects before deleting
-                    Payment.query.filter_by(user_id=target_user.id).delete()
-                    Complaint.query.filter_by(user_id=target_user.id).delete()
-                    Notification.query.filter_by(user_id=target_user.id).delete()
-                    db.session.delete(target_user)
+                    # Remove related rows, then the user, with plain DELETE
+                    # statements in one transaction.  Going through
+                    # ``session.delete`` would first load each of the
+                    # user's collections only to find them empty.
+                    display_name = target_user.display_name
+                    for model in (Payment, Complaint, Notification):
+                        db.session.execute(
+                            db.delete(model).where(model.user_id == target_id),
+                            execution_options={'synchronize_session': False},
+                        )
+                    db.session.execute(
+                        db.delete(User).where(User.id == target_id),
+                        execution_options={'synchronize_session': False},
+                    )
                     db.session.commit()
-                    flash(f'Đã xóa tài khoản {target_user.display_name}.', 'success')
+                    cache.delete_memoized(get_payment_history, target_id)
+                    flash(f'Đã xóa tài khoản {display_name}.', 'success')
             else:
                 flash('Không thể thực hiện hành động trên tài khoản này.', 'warning')
-    # Retrieve all users for display
-    users = User.query.order_by(User.registered_at.desc()).all()
+    # Retrieve all users for display.  The template only shows columns, so
+    # any relationship access would be an accidental per-row query.
+    users = User.query.options(raiseload('*')).order_by(User.registered_at.desc()).all()
     return render_template(
         'admin_users.html', user=user, users=users,
         breadcrumbs=[
-            {'label': 'Trang Chủ', 'url': url_for('index')},
-            {'label': 'Quản Trị', 'url': url_for('admin')},
-            {'label': 'Quản Lí User', 'url': url_for('admin_users')}
+            {'label': 'Trang Chủ', 'url': page_url('index')},
+            {'label': 'Quản Trị', 'url': page_url('admin')},
+            {'label': 'Quản Lí User', 'url': page_url('admin_users')}
         ]
     )
 
@@ -1423,17 +2191,21 @@ def delete_violation(violation_id: int) -> str:
     if not user.is_admin:
         flash('Truy cập bị từ chối.', 'danger')
         return redirect(url_for('index'))
-    record = ViolationRecord.query.get_or_404(violation_id)
-    # Remove from Excel
-    excel_path = os.path.join(BASE_DIR, '..', 'Danh Sách Vi Phạm .xlsm')
-    try:
-        remove_violation_from_excel(record, excel_path)
-    except Exception:
-        pass
+    record = db.get_or_404(ViolationRecord, violation_id)
+    # Remove from Excel in the background.  The worker receives a plain
+    # snapshot because the ORM instance is deleted (and expired) below.
+    snapshot = SimpleNamespace(
+        sheet_name=record.sheet_name,
+        student_name=record.student_name,
+        date=record.date,
+        amount_due=record.amount_due,
+    )
+    queue_excel_update('delete', snapshot)
     # Delete the record and any associated complaints
     Complaint.query.filter_by(violation_id=record.id).delete()
     db.session.delete(record)
     db.session.commit()
+    invalidate_dashboard()
     flash('Đã xóa vi phạm thành công.', 'success')
     return redirect(url_for('admin'))
 
@@ -1463,33 +2235,30 @@ def calculate_amount_api() -> 'Response':
         if student and date_str and code:
             # parse date
             record_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            from .utils import compute_custom_week
             week = compute_custom_week(record_date)
             # base default amount
-            code_obj = ErrorCode.query.get(code)
-            base_amount = code_obj.default_amount if code_obj else 0
+            base_amount = get_error_defaults().get(code, 0)
             if code in ('VP01', 'VP06'):
                 # count previous occurrences for incremental penalty
-                prior_count = ViolationRecord.query.filter_by(
-                    student_name=student,
-                    error_code=code,
-                    week=week
-                ).count()
-                amount = base_amount + 10000 * prior_count
+                amount = base_amount + 10000 * count_prior_offences(student, code, week)
             else:
                 amount = base_amount
     except Exception:
         amount = 0
-    return jsonify({'amount': amount})
+    # The add-violation form asks again on every field change.  Let the
+    # browser reuse an answer briefly and revalidate it cheaply after
+    # that.  Kept as short as the server-side count cache: the form would
+    # otherwise prefill a stale amount right after a violation is added.
+    response = jsonify({'amount': amount})
+    response.headers['Cache-Control'] = f'public, max-age={AMOUNT_API_MAX_AGE}'
+    response.add_etag()
+    return response.make_conditional(request)
 
 
 # -----------------------------------------------------------------------------
 # Entry point
 # -----------------------------------------------------------------------------
 
-with app.app_context():
-    initialise_database()
-    
 if __name__ == '__main__':
     # When running directly, perform a quick environment check.  The web app
     # should be reachable at http://localhost:5000
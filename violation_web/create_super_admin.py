@@ -1,8 +1,13 @@
-from violation_web.app import app, db, User
+from violation_web.app import app, db, ensure_database, User
 from werkzeug.security import generate_password_hash
 
 with app.app_context():
-    existing = User.query.filter_by(username="admin").first()
+    ensure_database()
+
+    # Only the id is needed to know whether the account exists.
+    existing = db.session.execute(
+        db.select(User.id).filter_by(username="admin")
+    ).scalar()
 
     if existing:
         print("User admin already exists!")
@@ -11,7 +16,7 @@ with app.app_context():
             username="admin",
             display_name="Admin",
             email="admin@admin.com",
-            password=generate_password_hash("Administrator111"),
+            password_hash=generate_password_hash("Administrator111"),
             is_admin=True,
             is_super_admin=True
         )
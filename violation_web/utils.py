@@ -8,10 +8,13 @@ readability and makes it easier to test individual pieces of functionality.
 """
 
 import base64
+import contextlib
+import functools
 import io
+import json
 import os
 from datetime import datetime, date
-from typing import Any, Dict, Iterable, Optional, Tuple, Type
+from typing import Any, Dict, Iterable, Optional, Tuple, Type, Union
 
 import pandas as pd
 
@@ -27,7 +30,23 @@ try:
 except ImportError:
     _PIL_AVAILABLE = False
 
+try:
+    import fcntl  # type: ignore
+except ImportError:  # not available on Windows
+    fcntl = None
+
+
+@functools.lru_cache(maxsize=4096)
+def _normalise_name(name: str) -> str:
+    """
+    Normalise a student name the way DS_LOP names are stored: words
+    capitalised and separated by single spaces.  Worksheet scans see the
+    same few dozen names over and over, so results are cached.
+    """
+    return ' '.join([part.capitalize() for part in name.split()])
+
 
+@functools.lru_cache(maxsize=1024)
 def compute_week_number(d: date) -> int:
     """
     Compute the ISO week number for a given date.
@@ -99,76 +118,101 @@ def remove_violation_from_excel(record: Any, excel_path: str) -> None:
         record: A ``ViolationRecord`` instance from the database.
         excel_path: Path to the Excel workbook to update.
     """
+    try:
+        apply_excel_updates(excel_path, [('delete', record)])
+    except Exception:
+        pass
+
+
+def _violation_row_key(row: tuple) -> Optional[tuple]:
+    """
+    Return ``(name, 'YYYY-MM-DD' date, amount due)`` for a worksheet data
+    row given as cell values, or None if the row has no numeric STT or no
+    name.  Names are normalised (capitalised words) for comparison.
+    """
     import datetime as _dt
-    if not os.path.exists(excel_path):
-        return
+    # Column A holds STT; skip non-numeric rows
     try:
-        import openpyxl  # type: ignore
-    except ImportError:
-        # If openpyxl is unavailable we cannot modify the file
-        return
+        int(row[0])
+    except Exception:
+        return None
+    # Column C (index 2) holds date
+    date_val = None
+    if len(row) > 2:
+        date_cell = row[2]
+        # Normalise date cell to string for comparison
+        if isinstance(date_cell, _dt.datetime):
+            date_val = date_cell.date().strftime('%Y-%m-%d')
+        elif isinstance(date_cell, _dt.date):
+            date_val = date_cell.strftime('%Y-%m-%d')
+        elif isinstance(date_cell, (int, float)):
+            # Excel serial date
+            try:
+                excel_start = _dt.datetime(1899, 12, 30)
+                serial_date = excel_start + _dt.timedelta(days=int(date_cell))
+                date_val = serial_date.date().strftime('%Y-%m-%d')
+            except Exception:
+                date_val = None
+        elif isinstance(date_cell, str):
+            date_val = date_cell.strip()
+    # Column D (index 3) holds name
+    name_val = row[3] if len(row) > 3 else None
+    if not isinstance(name_val, str):
+        return None
+    current_name = _normalise_name(name_val)
+    # Column H (index 7) holds amount due; we compare to ensure correct row
+    amount_val = row[7] if len(row) > 7 else None
     try:
-        wb = openpyxl.load_workbook(excel_path)
+        current_amount = int(str(amount_val).replace(',', '').replace('.', '')) if amount_val not in (None, '') else 0
     except Exception:
-        return
-    sheet_name = record.sheet_name
-    if sheet_name not in wb.sheetnames:
-        return
-    ws = wb[sheet_name]
-    # normalise the target name for comparison
-    target_name = ' '.join([p.capitalize() for p in record.student_name.strip().split()])
-    target_date_str = record.date.strftime('%Y-%m-%d') if isinstance(record.date, _dt.date) else str(record.date)
-    # iterate over rows and identify the row to remove
-    row_to_delete = None
-    for idx, row in enumerate(ws.iter_rows(min_row=1, max_row=ws.max_row), start=1):
-        # Column A holds STT; skip non-numeric rows
-        cell_val = row[0].value
-        try:
-            int(cell_val)
-        except Exception:
-            continue
-        # Column C (index 2) holds date
-        if len(row) > 2:
-            date_cell = row[2].value
-            # Normalise date cell to string for comparison
-            date_val = None
-            if isinstance(date_cell, _dt.datetime):
-                date_val = date_cell.date().strftime('%Y-%m-%d')
-            elif isinstance(date_cell, _dt.date):
-                date_val = date_cell.strftime('%Y-%m-%d')
-            elif isinstance(date_cell, (int, float)):
-                # Excel serial date
-                try:
-                    excel_start = _dt.datetime(1899, 12, 30)
-                    serial_date = excel_start + _dt.timedelta(days=int(date_cell))
-                    date_val = serial_date.date().strftime('%Y-%m-%d')
-                except Exception:
-                    date_val = None
-            elif isinstance(date_cell, str):
-                date_val = date_cell.strip()
-        else:
-            date_val = None
-        # Column D (index 3) holds name
-        name_val = row[3].value if len(row) > 3 else None
-        if not isinstance(name_val, str):
-            continue
-        current_name = ' '.join([p.capitalize() for p in name_val.strip().split()])
-        # Column H (index 7) holds amount due; we compare to ensure correct row
-        amount_val = row[7].value if len(row) > 7 else None
-        try:
-            current_amount = int(str(amount_val).replace(',', '').replace('.', '')) if amount_val not in (None, '') else 0
-        except Exception:
-            current_amount = 0
-        # Compare name, date and amount
-        if current_name == target_name and date_val == target_date_str and current_amount == record.amount_due:
-            row_to_delete = idx
-            break
-    if row_to_delete:
-        try:
-            ws.delete_rows(row_to_delete, 1)
-            wb.save(excel_path)
-        except Exception:
-            pass
+        current_amount = 0
+    return current_name, date_val, current_amount
+
+
+def _record_row_key(record: Any) -> tuple:
+    """The ``_violation_row_key`` a worksheet row for ``record`` would have."""
+    target_name = _normalise_name(record.student_name)
+    target_date_str = record.date.strftime('%Y-%m-%d') if isinstance(record.date, date) else str(record.date)
+    return target_name, target_date_str, record.amount_due
+
+
+def _find_violation_row(ws: Any, record: Any) -> Optional[int]:
+    """Return the number of the first row of ``ws`` matching ``record``."""
+    target = _record_row_key(record)
+    for idx, row in enumerate(ws.iter_rows(min_row=1, values_only=True), start=1):
+        if _violation_row_key(row) == target:
+            return idx
+    return None
+
+
+# (path, sheet) -> (file mtime, row index) for ``_violation_row_index``
+_ROW_INDEX_CACHE: Dict[Tuple[str, str], Tuple[int, dict]] = {}
+
+
+def _violation_row_index(excel_path: str, sheet_name: str) -> dict:
+    """
+    Map each ``_violation_row_key`` of ``sheet_name`` to its first row
+    number.  The sheet is scanned once with a read-only workbook and the
+    result reused until the file changes on disk.
+    """
+    import openpyxl  # type: ignore
+    mtime = os.stat(excel_path).st_mtime_ns
+    cached = _ROW_INDEX_CACHE.get((excel_path, sheet_name))
+    if cached and cached[0] == mtime:
+        return cached[1]
+    index: dict = {}
+    wb = openpyxl.load_workbook(excel_path, read_only=True)
+    try:
+        if sheet_name in wb.sheetnames:
+            rows = wb[sheet_name].iter_rows(min_row=1, values_only=True)
+            for idx, row in enumerate(rows, start=1):
+                key = _violation_row_key(row)
+                if key is not None:
+                    index.setdefault(key, idx)
+    finally:
+        wb.close()
+    _ROW_INDEX_CACHE[(excel_path, sheet_name)] = (mtime, index)
+    return index
 
 
 def generate_qr_code_base64(data: str) -> str:
@@ -205,11 +249,23 @@ def generate_qr_code_base64(data: str) -> str:
         # If neither qrcode nor PIL is available return an empty string
         return ''
     buffered = io.BytesIO()
-    img.save(buffered, format="PNG")
+    # QR codes are small two-colour images; the fastest deflate level
+    # costs only a few extra bytes here.
+    img.save(buffered, format="PNG", compress_level=1)
     encoded = base64.b64encode(buffered.getvalue()).decode('ascii')
     return f"data:image/png;base64,{encoded}"
 
 
+# Custom school calendar: week 1 starts on Monday 8/9/2025 and the Tết
+# break (15/2/2026 - 28/2/2026 inclusive) is skipped.  Kept as day
+# ordinals so ``compute_custom_week`` is plain integer arithmetic.
+_TERM_START_ORDINAL = date(2025, 9, 8).toordinal()
+_BREAK_START_ORDINAL = date(2026, 2, 15).toordinal()
+_BREAK_END_ORDINAL = date(2026, 2, 28).toordinal()
+_BREAK_LENGTH = _BREAK_END_ORDINAL - _BREAK_START_ORDINAL + 1
+
+
+@functools.lru_cache(maxsize=1024)
 def compute_custom_week(d: date) -> int:
     """
     Compute a custom week number starting from 8 September 2025 (week 1)
@@ -224,24 +280,107 @@ def compute_custom_week(d: date) -> int:
     Returns:
         The custom week number (starting at 1).
     """
-    # Define start and break periods
-    start_date = date(2025, 9, 8)  # Monday 8/9/2025 is week 1
-    break_start = date(2026, 2, 15)
-    break_end = date(2026, 2, 28)
-    if d < start_date:
+    day = d.toordinal()
+    if day < _TERM_START_ORDINAL:
         return 1
     # If within the break, treat as previous day just before break
-    if break_start <= d <= break_end:
-        d_effective = break_start - pd.Timedelta(days=1)
-    else:
-        d_effective = d
+    if _BREAK_START_ORDINAL <= day <= _BREAK_END_ORDINAL:
+        day = _BREAK_START_ORDINAL - 1
     # Compute days since start, adjusting for break period
-    delta_days = (d_effective - start_date).days
+    delta_days = day - _TERM_START_ORDINAL
     # If the date is after the break, subtract the length of the break
-    if d_effective > break_end:
-        delta_days -= (break_end - break_start).days + 1
-    week_num = delta_days // 7 + 1
-    return week_num
+    if day > _BREAK_END_ORDINAL:
+        delta_days -= _BREAK_LENGTH
+    return delta_days // 7 + 1
+
+
+def _is_integer_like(value: Any) -> bool:
+    """Return True if ``value`` converts to ``int`` (the STT of a data row)."""
+    if pd.isna(value):
+        return False
+    try:
+        int(value)
+    except Exception:
+        return False
+    return True
+
+
+def _cells_of_type(col: pd.Series, types: Tuple[type, ...]) -> pd.Series:
+    """Boolean mask of the non-missing cells of ``col`` that are ``types``."""
+    return col.map(lambda v: isinstance(v, types)).astype(bool) & col.notna()
+
+
+def _sheet_records(df: pd.DataFrame, default_amount: int) -> list:
+    """
+    Convert one violation worksheet into a list of column dicts for
+    ``ViolationRecord``, working on whole columns instead of row by row.
+
+    Data rows are those with an integer STT (column A), a student name
+    and a date.  Cells of an unexpected type fall back to the same
+    defaults as an empty cell: no reason or notes, nothing paid and the
+    sheet's default amount due.
+    """
+    # Columns past the end of a narrower sheet read as empty
+    df = df.reindex(columns=range(9)).astype(object)
+    dates = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+    is_datetime = _cells_of_type(df[2], (datetime,))
+    dates[is_datetime] = pd.to_datetime(df[2][is_datetime])
+    is_text = _cells_of_type(df[2], (str,))
+    dates[is_text] = pd.to_datetime(df[2][is_text], format='%Y-%m-%d', errors='coerce')
+    keep = df[0].map(_is_integer_like).astype(bool) & df[3].notna() & dates.notna()
+    df, dates = df[keep], dates[keep]
+    if df.empty:
+        return []
+    # Week from column B, or from the date when missing or not a number
+    weeks = df[1].map(lambda v: int(v) if _is_integer_like(v) else None)
+    missing_week = weeks.isna()
+    weeks[missing_week] = dates[missing_week].map(lambda d: compute_week_number(d.date()))
+
+    def text(col: pd.Series) -> pd.Series:
+        return col.where(_cells_of_type(col, (str,))).str.strip()
+
+    def amount(col: pd.Series, default: int) -> pd.Series:
+        numbers = col.where(_cells_of_type(col, (int, float)))
+        return pd.to_numeric(numbers).fillna(default).astype('int64')
+
+    # Payment date: a date cell, or an Excel serial day number
+    payment_dates = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+    is_datetime = _cells_of_type(df[6], (datetime,))
+    payment_dates[is_datetime] = pd.to_datetime(df[6][is_datetime])
+    is_serial = _cells_of_type(df[6], (int, float))
+    payment_dates[is_serial] = pd.to_datetime(
+        pd.to_numeric(df[6][is_serial]).astype('int64'), unit='D', origin='1899-12-30'
+    )
+    # normalise names (capitalisation) to match DS_LOP
+    names = df[3].astype(str).map(_normalise_name)
+    columns = pd.DataFrame({
+        'week': weeks.fillna(0).astype('int64'),
+        'date': dates.dt.date,
+        'student_name': names,
+        'reason': text(df[4]),
+        'amount_due': amount(df[7], default_amount),
+        'amount_paid': amount(df[5], 0),
+        'payment_date': payment_dates.dt.date,
+        'notes': text(df[8]),
+    })
+    # Plain Python values, with None for empty cells
+    return columns.astype(object).where(columns.notna(), None).to_dict('records')
+
+
+def _open_excel(excel_path: str) -> pd.ExcelFile:
+    """
+    Open a workbook for reading with pandas.  The Rust-based ``calamine``
+    engine (``python-calamine``, pandas 2.2+) parses much faster than
+    openpyxl and is used when available; otherwise fall back to openpyxl.
+    """
+    try:
+        return pd.ExcelFile(excel_path, engine='calamine')
+    except (ImportError, ValueError):
+        return pd.ExcelFile(excel_path, engine='openpyxl')
+
+
+# Rows per INSERT executemany during the initial workbook import.
+IMPORT_BATCH_SIZE = 1000
 
 
 def import_excel_if_needed(
@@ -275,102 +414,22 @@ def import_excel_if_needed(
         'NGU_TRONG_GIO': ('VP05', 10000),
         'NGHI_HOC': ('VP06', 30000),
     }
-    # iterate through each sheet of interest
-    xls = pd.ExcelFile(excel_path)
-    for sheet_name, (code, default_amount) in sheet_map.items():
-        if sheet_name not in xls.sheet_names:
-            continue
-        # load sheet; leave header as None so we can process manually
-        df = pd.read_excel(excel_path, sheet_name=sheet_name, header=None)
-        # iterate over rows and extract records
-        for idx, row in df.iterrows():
-            # skip header rows or separators
-            stt = row.iloc[0]
-            if pd.isna(stt):
-                continue
-            # ignore non‑numeric identifiers
-            try:
-                int(stt)
-            except Exception:
-                continue
-            # parse week
-            week_val = row.iloc[1]
-            try:
-                week = int(week_val) if not pd.isna(week_val) else None
-            except Exception:
-                week = None
-            # parse date
-            date_val = row.iloc[2]
-            record_date: Optional[date] = None
-            if isinstance(date_val, (datetime, pd.Timestamp)):
-                record_date = date_val.date()
-            elif isinstance(date_val, str):
-                try:
-                    record_date = datetime.strptime(date_val, '%Y-%m-%d').date()
-                except Exception:
-                    pass
-            # parse name
-            name = row.iloc[3] if len(row) > 3 else None
-            if pd.isna(name):
+    # iterate through each sheet of interest; the workbook is opened once
+    rows = []
+    with _open_excel(excel_path) as xls:
+        for sheet_name, (code, default_amount) in sheet_map.items():
+            if sheet_name not in xls.sheet_names:
                 continue
-            name = str(name).strip()
-            # parse reason (column 4)
-            reason = None
-            if len(row) > 4:
-                val = row.iloc[4]
-                if isinstance(val, str):
-                    reason = val.strip()
-            # amount paid (column 5)
-            amount_paid = 0
-            if len(row) > 5:
-                val = row.iloc[5]
-                if isinstance(val, (int, float)) and not pd.isna(val):
-                    amount_paid = int(val)
-            # payment date (column 6)
-            payment_date = None
-            if len(row) > 6:
-                val = row.iloc[6]
-                if isinstance(val, (datetime, pd.Timestamp)):
-                    payment_date = val.date()
-                elif isinstance(val, (float, int)):
-                    # Excel serial date number
-                    try:
-                        payment_date = datetime.fromordinal(datetime(1900, 1, 1).toordinal() + int(val) - 2).date()
-                    except Exception:
-                        payment_date = None
-            # amount due (column 7)
-            amount_due = default_amount
-            if len(row) > 7:
-                val = row.iloc[7]
-                if isinstance(val, (int, float)) and not pd.isna(val):
-                    amount_due = int(val)
-            # notes (column 8)
-            notes = None
-            if len(row) > 8:
-                val = row.iloc[8]
-                if isinstance(val, str):
-                    notes = val.strip()
-            # fallback week if missing: compute from date
-            if week is None and record_date is not None:
-                week = compute_week_number(record_date)
-            # ensure we have date
-            if record_date is None:
-                continue
-            # normalise names (capitalisation) to match DS_LOP
-            name = ' '.join([part.capitalize() for part in name.split()])
-            rec = ViolationRecord(
-                sheet_name=sheet_name,
-                week=week or 0,
-                date=record_date,
-                student_name=name,
-                error_code=code,
-                reason=reason,
-                amount_due=amount_due,
-                amount_paid=amount_paid,
-                payment_date=payment_date,
-                notes=notes,
-            )
-            db.session.add(rec)
+            # load sheet; leave header as None so we can process manually.
+            # Only columns A-I are used.
+            df = xls.parse(sheet_name, header=None, usecols=lambda col: col < 9)
+            for row in _sheet_records(df, default_amount):
+                row.update(sheet_name=sheet_name, error_code=code)
+                rows.append(row)
+    # Insert the plain row dicts in executemany batches instead of
+    # building an ORM object per row.
+    for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+        db.session.execute(db.insert(ViolationRecord), rows[start:start + IMPORT_BATCH_SIZE])
     # commit occurs outside this function
 
 
@@ -390,7 +449,8 @@ def get_ds_lop_names(excel_path: str) -> list:
     if not os.path.exists(excel_path):
         return []
     try:
-        df = pd.read_excel(excel_path, sheet_name='DS_LOP', header=None)
+        with _open_excel(excel_path) as xls:
+            df = xls.parse('DS_LOP', header=None)
     except Exception:
         return []
     names = []
@@ -402,17 +462,56 @@ def get_ds_lop_names(excel_path: str) -> list:
             continue
         name_val = row.iloc[1] if len(row) > 1 else None
         if isinstance(name_val, str) and name_val.strip():
-            name = ' '.join([part.capitalize() for part in name_val.strip().split()])
+            name = _normalise_name(name_val)
             names.append(name)
     # remove duplicates and sort
     unique_names = sorted(set(names))
     return unique_names
 
 
-def update_excel_payment(student_name: str, excel_path: str) -> None:
+def load_ds_lop_names(excel_path: str, snapshot_path: str, force: bool = False) -> list:
+    """
+    Return the ``DS_LOP`` student names, preferring a JSON snapshot over
+    parsing the workbook.  Opening the ``.xlsm`` is slow and memory hungry,
+    so after a successful parse the names are written to ``snapshot_path``
+    and later calls reuse that file as long as it is at least as new as
+    the workbook.
+
+    Args:
+        excel_path: Absolute path to the Excel workbook.
+        snapshot_path: Path of the JSON snapshot file.
+        force: Ignore an existing snapshot and re-read the workbook.
+
+    Returns:
+        A sorted list of unique names (see ``get_ds_lop_names``).
+    """
+    if not force and os.path.exists(snapshot_path):
+        if not os.path.exists(excel_path) or os.path.getmtime(excel_path) <= os.path.getmtime(snapshot_path):
+            try:
+                with open(snapshot_path, encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+    names = get_ds_lop_names(excel_path)
+    if names:
+        try:
+            with open(snapshot_path, 'w', encoding='utf-8') as f:
+                json.dump(names, f, ensure_ascii=False)
+        except OSError:
+            pass
+    return names
+
+
+# Worksheets holding violation rows, in the layout of the import
+_VIOLATION_SHEET_NAMES = (
+    'NHAT_KI_DI_MUON', 'NG_LA', 'DOI_CHO', 'QUEN_DDHT', 'NGU_TRONG_GIO', 'NGHI_HOC'
+)
+
+
+def update_excel_payment(student_name: Union[str, Iterable[str]], excel_path: str) -> None:
     """
-    Mark all outstanding debts for the specified student as paid in the
-    original Excel workbook.  For each relevant worksheet the function
+    Mark all outstanding debts for the specified student (or students) as
+    paid in the original Excel workbook.  For each relevant worksheet the function
     will move the value from ``Số Tiền Chưa Nộp`` into ``Nộp Tiền`` and
     set the unpaid amount to zero.  It also records the current date in
     the ``Ngày Nộp`` column.
@@ -422,73 +521,58 @@ def update_excel_payment(student_name: str, excel_path: str) -> None:
     complicated macros; it simply writes values into the existing cells.
 
     Args:
-        student_name: Normalised name (title case) of the student.
+        student_name: Normalised name (title case) of the student, or an
+            iterable of names to update in a single load/save of the file.
         excel_path: Path to the original Excel file to update.
     """
-    if not os.path.exists(excel_path):
-        return
-    try:
-        import openpyxl  # defer import to avoid dependency when unused
-    except ImportError:
-        return
-    # sheets mapping to update
-    sheet_names = [
-        'NHAT_KI_DI_MUON', 'NG_LA', 'DOI_CHO', 'QUEN_DDHT', 'NGU_TRONG_GIO', 'NGHI_HOC'
-    ]
-    wb = openpyxl.load_workbook(excel_path)
-    today_str = datetime.today().strftime('%Y-%m-%d')
-    for sheet_name in sheet_names:
-        if sheet_name not in wb.sheetnames:
+    apply_excel_updates(excel_path, [('pay', student_name)])
+
+
+def _owed_rows(ws: Any, student_names: set) -> list:
+    """
+    Return ``(row number, row length, previous paid, unpaid)`` for every
+    row of ``ws`` belonging to ``student_names`` with an unpaid amount.
+    """
+    owed = []
+    # iterate rows; header is in first few rows; data rows contain numeric STT in column A
+    for idx, row in enumerate(ws.iter_rows(min_row=1, values_only=True), start=1):
+        try:
+            int(row[0])
+        except Exception:
             continue
-        ws = wb[sheet_name]
-        # iterate rows; header is in first few rows; data rows contain numeric STT in column A
-        for row in ws.iter_rows(min_row=1, max_row=ws.max_row):
-            stt_cell = row[0]
-            try:
-                stt = int(stt_cell.value)
-            except Exception:
-                continue
-            # get name (column index 3) if present
-            if len(row) < 4:
-                continue
-            name_cell = row[3]
-            name_val = name_cell.value
-            if not isinstance(name_val, str):
-                continue
-            # normalise both names for comparison
-            target_name = ' '.join([part.capitalize() for part in name_val.strip().split()])
-            if target_name != student_name:
-                continue
-            # get unpaid amount from column index 7 (H column) if exists
-            if len(row) < 8:
-                continue
-            unpaid_cell = row[7]
+        # get name (column index 3) if present
+        if len(row) < 4:
+            continue
+        name_val = row[3]
+        if not isinstance(name_val, str):
+            continue
+        # normalise both names for comparison
+        target_name = _normalise_name(name_val)
+        if target_name not in student_names:
+            continue
+        # get unpaid amount from column index 7 (H column) if exists
+        if len(row) < 8:
+            continue
+        amount_unpaid = 0
+        try:
+            if row[7] is not None:
+                amount_unpaid = int(str(row[7]).replace(',', '').replace('.', ''))
+        except Exception:
             amount_unpaid = 0
-            try:
-                if unpaid_cell.value is not None:
-                    amount_unpaid = int(str(unpaid_cell.value).replace(',', '').replace('.', ''))
-            except Exception:
-                amount_unpaid = 0
-            if amount_unpaid <= 0:
-                continue
-            # update paid amount (column 5, index 5)
-            if len(row) > 5:
-                paid_cell = row[5]
-                prev_paid = 0
-                try:
-                    if paid_cell.value is not None:
-                        prev_paid = int(str(paid_cell.value).replace(',', '').replace('.', ''))
-                except Exception:
-                    prev_paid = 0
-                new_paid = prev_paid + amount_unpaid
-                paid_cell.value = f"{new_paid}"
-            # update payment date (column 6, index 6)
-            if len(row) > 6:
-                date_cell = row[6]
-                date_cell.value = today_str
-            # reset unpaid amount
-            unpaid_cell.value = 0
-    wb.save(excel_path)
+        if amount_unpaid <= 0:
+            continue
+        prev_paid = 0
+        try:
+            if row[5] is not None:
+                prev_paid = int(str(row[5]).replace(',', '').replace('.', ''))
+        except Exception:
+            prev_paid = 0
+        owed.append((idx, len(row), prev_paid, amount_unpaid))
+    return owed
+
+
+def _payment_names(payload: Union[str, Iterable[str]]) -> set:
+    return {payload} if isinstance(payload, str) else set(payload)
 
 
 def append_violation_to_excel(record: Any, excel_path: str) -> None:
@@ -504,23 +588,16 @@ def append_violation_to_excel(record: Any, excel_path: str) -> None:
             attributes) containing the data to append.
         excel_path: Path to the original Excel file to update.
     """
-    if not os.path.exists(excel_path):
-        return
-    try:
-        import openpyxl
-    except ImportError:
-        return
-    wb = openpyxl.load_workbook(excel_path)
-    sheet_name = getattr(record, 'sheet_name', None)
-    if not sheet_name or sheet_name not in wb.sheetnames:
-        return
-    ws = wb[sheet_name]
+    apply_excel_updates(excel_path, [('append', record)])
+
+
+def _append_violation_row(ws: Any, record: Any) -> None:
+    """Append ``record`` to ``ws`` with the next STT."""
     # Determine the next STT by scanning the first column for the last numeric value
     last_stt = 0
-    for row in ws.iter_rows(min_row=1, max_row=ws.max_row):
-        cell = row[0]
+    for (stt,) in ws.iter_rows(min_row=1, max_col=1, values_only=True):
         try:
-            val = int(cell.value)
+            val = int(stt)
             if val > last_stt:
                 last_stt = val
         except Exception:
@@ -543,4 +620,116 @@ def append_violation_to_excel(record: Any, excel_path: str) -> None:
     notes = getattr(record, 'notes', None) or ''
     new_row = [new_stt, week, date_str, student, reason, amount_paid, payment_date_str, amount_due, notes]
     ws.append(new_row)
-    wb.save(excel_path)
\ No newline at end of file
+
+
+def _update_has_effect(excel_path: str, kind: str, payload: Any) -> bool:
+    """
+    Tell from a read-only scan whether a single update would change the
+    file: a delete needs a matching row and a payment an unpaid one.
+    """
+    import openpyxl  # type: ignore
+    if kind == 'delete':
+        return _record_row_key(payload) in _violation_row_index(excel_path, payload.sheet_name)
+    if kind == 'pay':
+        names = _payment_names(payload)
+        wb = openpyxl.load_workbook(excel_path, read_only=True)
+        try:
+            return any(
+                _owed_rows(wb[sheet_name], names)
+                for sheet_name in _VIOLATION_SHEET_NAMES if sheet_name in wb.sheetnames
+            )
+        finally:
+            wb.close()
+    return True
+
+
+@contextlib.contextmanager
+def _excel_write_lock(excel_path: str):
+    """
+    Hold an exclusive lock on ``<excel_path>.lock`` for the duration of the
+    block.  Each worker process batches its own changes, so without the
+    lock two workers could load the workbook together and the later save
+    would drop the other's rows.  Without ``fcntl`` (Windows) no lock is
+    taken and a single worker process must be used.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(excel_path + '.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def apply_excel_updates(excel_path: str, updates: Iterable[Tuple[str, Any]]) -> None:
+    """
+    Apply a batch of changes to the original Excel workbook with a single
+    load and save of the file.  Loading the workbook for writing is by far
+    the slowest step, so the web app collects the changes made within a
+    short window and writes them together.
+
+    ``updates`` is a sequence of ``(kind, payload)`` pairs applied in
+    order, with the same effect as calling the single-change helpers one
+    after another:
+
+    * ``('append', record)`` – see ``append_violation_to_excel``
+    * ``('delete', record)`` – see ``remove_violation_from_excel``
+    * ``('pay', name or names)`` – see ``update_excel_payment``
+
+    A lone delete or payment is first checked with a read-only scan and
+    the file is not opened for writing when it would not change.  The
+    whole read-modify-write runs under a lock file shared by all worker
+    processes.
+
+    Args:
+        excel_path: Path to the original Excel file to update.
+        updates: The changes to apply.
+    """
+    if not os.path.exists(excel_path):
+        return
+    try:
+        import openpyxl  # defer import to avoid dependency when unused
+    except ImportError:
+        return
+    updates = list(updates)
+    if not updates:
+        return
+    with _excel_write_lock(excel_path):
+        if len(updates) == 1 and not _update_has_effect(excel_path, *updates[0]):
+            return
+        wb = openpyxl.load_workbook(excel_path)
+        today_str = datetime.today().strftime('%Y-%m-%d')
+        changed = False
+        for kind, payload in updates:
+            if kind == 'pay':
+                names = _payment_names(payload)
+                for sheet_name in _VIOLATION_SHEET_NAMES:
+                    if sheet_name not in wb.sheetnames:
+                        continue
+                    ws = wb[sheet_name]
+                    for idx, row_len, prev_paid, amount_unpaid in _owed_rows(ws, names):
+                        # update paid amount (column F) and payment date (column G)
+                        if row_len > 5:
+                            ws.cell(row=idx, column=6).value = f"{prev_paid + amount_unpaid}"
+                        if row_len > 6:
+                            ws.cell(row=idx, column=7).value = today_str
+                        # reset unpaid amount
+                        ws.cell(row=idx, column=8).value = 0
+                        changed = True
+                continue
+            sheet_name = getattr(payload, 'sheet_name', None)
+            if not sheet_name or sheet_name not in wb.sheetnames:
+                continue
+            ws = wb[sheet_name]
+            if kind == 'append':
+                _append_violation_row(ws, payload)
+                changed = True
+            elif kind == 'delete':
+                row_to_delete = _find_violation_row(ws, payload)
+                if row_to_delete:
+                    ws.delete_rows(row_to_delete, 1)
+                    changed = True
+        if changed:
+            wb.save(excel_path)